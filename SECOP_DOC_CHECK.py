@@ -8,12 +8,14 @@ SECOP II DOC CHECK
 """
 
 import os
-import re
 import csv
+import html
+from collections import namedtuple, deque
+from concurrent.futures import ThreadPoolExecutor
+import queue
 import platform
 import webbrowser
 import subprocess
-import time
 from datetime import datetime
 from pathlib import Path
 import tkinter as tk
@@ -28,156 +30,308 @@ MAX_PATH_DEFAULT = 240
 MAX_FILE_NAME_DEFAULT = 100
 MAX_DEPTH_DEFAULT = 5
 
+# Recorrido en paralelo solo si la raíz tiene al menos estas subcarpetas
+PARALLEL_MIN_SUBTREES = 4
+# Cada hilo entrega sus filas en lotes por una cola acotada: en memoria quedan a lo
+# sumo hilos * SUBTREE_QUEUE_BATCHES * SUBTREE_BATCH_ROWS filas pendientes
+SUBTREE_BATCH_ROWS = 1024
+SUBTREE_QUEUE_BATCHES = 4
+
 # Reglas
 FORBIDDEN_CHARS_PATTERN = r'[\\/:*?"<>|%&#+\{\}\[\];,=]'
 DIACRITIC_CHARS_PATTERN  = r'[áéíóúüÁÉÍÓÚÜñÑçÇãÃõÕ]'
+FORBIDDEN_CHARS = '\\/:*?"<>|%&#+{}[];,='   # mismos caracteres que FORBIDDEN_CHARS_PATTERN
+DIACRITIC_CHARS = 'áéíóúüÁÉÍÓÚÜñÑçÇãÃõÕ'     # mismos caracteres que DIACRITIC_CHARS_PATTERN
 HIDDEN_BASENAMES = {'Thumbs.db', '.DS_Store', '.ds_store', 'desktop.ini'}
 
 # ======= Utilidades =======
-def rel_depth(full_path: str, root: str) -> int:
-    rel = os.path.relpath(full_path, root)
-    if rel in ('.', ''):
-        return 0
-    return len([p for p in re.split(r'[\\/]+', rel) if p])
-
-def safe_walk(root: str):
-    """os.walk tolerante a rutas largas en Windows."""
-    if platform.system() == 'Windows':
-        def add_prefix(p):
-            p = os.path.abspath(p)
-            if p.startswith('\\\\?\\') or p.startswith('\\\\.\\'):
-                return p
-            if p.startswith('\\\\'):
-                return '\\\\?\\UNC\\' + p[2:]
-            return '\\\\?\\' + p
+IS_WINDOWS = platform.system() == 'Windows'
+
+def _long_prefix(p: str) -> str:
+    """Antepone el prefijo de ruta larga de Windows si aún no lo tiene."""
+    p = os.path.abspath(p)
+    if p.startswith('\\\\?\\') or p.startswith('\\\\.\\'):
+        return p
+    if p.startswith('\\\\'):
+        return '\\\\?\\UNC\\' + p[2:]
+    return '\\\\?\\' + p
+
+def _strip_long_prefix(p: str) -> str:
+    if p.startswith('\\\\?\\UNC\\'):
+        return '\\\\' + p[8:]
+    if p.startswith('\\\\?\\'):
+        return p[4:]
+    return p
+
+def safe_walk(root: str, root_depth: int = 0):
+    """
+    Recorrido iterativo con os.scandir (tolerante a rutas largas en Windows).
+    Produce (dirpath, depth, dirs, files) donde dirs/files son listas de os.DirEntry;
+    is_dir() reutiliza el tipo devuelto por el listado, sin stat extra.
+    Como os.walk: un enlace a carpeta va en dirs pero no se desciende en él.
+    La profundidad se arrastra en la pila (root = root_depth), sin relpath por entrada.
+    """
+    scan_root = _long_prefix(root) if IS_WINDOWS else root
+    stack = [(scan_root, root_depth)]
+    while stack:
+        d, depth = stack.pop()
         try:
-            for dirpath, dirnames, filenames in os.walk(add_prefix(root)):
-                if dirpath.startswith('\\\\?\\UNC\\'):
-                    dirpath = '\\\\' + dirpath[8:]
-                elif dirpath.startswith('\\\\?\\'):
-                    dirpath = dirpath[4:]
-                yield dirpath, dirnames, filenames
-            return
-        except Exception:
-            pass
-    for dirpath, dirnames, filenames in os.walk(root):
-        yield dirpath, dirnames, filenames
+            it = os.scandir(d)
+        except OSError:
+            continue
+        dirs, files = [], []
+        with it:
+            try:
+                for e in it:
+                    try:
+                        is_dir = e.is_dir()
+                    except OSError:
+                        is_dir = False
+                    (dirs if is_dir else files).append(e)
+            except OSError:
+                pass   # listado cortado a medias (red, E/S): se sigue con lo ya leído
+        yield _strip_long_prefix(d), depth, dirs, files
+        stack.extend((e.path, depth + 1) for e in reversed(dirs) if not _is_link(e))
+
+def _is_link(e: os.DirEntry) -> bool:
+    try:
+        return e.is_symlink()
+    except OSError:
+        return True   # como os.walk: ante la duda no se desciende
 
 # ======= Validación =======
-def _validate_item(name, full, tipo, root, max_path, max_file_name, max_depth,
-                   forbidden_re, diacritics_re, counts):
-    plen, nlen, depth = len(full), len(name), rel_depth(full, root)
-    issues = []
-
-    if forbidden_re.search(name):
-        issues.append('CaracteresProhibidos'); counts['forbidden_chars'] += 1
-    if diacritics_re.search(name):
-        issues.append('Diacriticos'); counts['diacritics'] += 1
+# Tabla para str.translate: prohibidos -> \x01, diacríticos -> \x02 (los
+# propios marcadores se eliminan), así un solo recorrido en C detecta ambos.
+_MARK_FORBIDDEN = '\x01'
+_MARK_DIACRITIC = '\x02'
+_CHECK_TABLE = {ord(_MARK_FORBIDDEN): None, ord(_MARK_DIACRITIC): None}
+_CHECK_TABLE.update({ord(c): _MARK_FORBIDDEN for c in FORBIDDEN_CHARS})
+_CHECK_TABLE.update({ord(c): _MARK_DIACRITIC for c in DIACRITIC_CHARS})
+# Camino rápido ASCII: no puede haber diacríticos y los prohibidos se borran con
+# bytes.translate; si la longitud no cambia, el nombre está limpio.
+_FORBIDDEN_BYTES = FORBIDDEN_CHARS.encode('ascii')
+
+# Problemas como bits, en orden de prioridad (bit 0 = más prioritario)
+ISSUE_KEYS = ('CaracteresProhibidos', 'Diacriticos', 'Ruta>MaxPath',
+              'Nombre>MaxFileName', 'Profundidad>MaxDepth', 'Oculto/Temporal')
+ISSUE_FORBIDDEN, ISSUE_DIACRITIC, ISSUE_PATH, ISSUE_NAME, ISSUE_DEPTH, ISSUE_HIDDEN = (
+    1 << i for i in range(len(ISSUE_KEYS)))
+
+# Tablas indexadas por máscara: texto "Problemas", prioridad (99 = sin problemas) y bits
+_MASK_TEXT = tuple(','.join(k for i, k in enumerate(ISSUE_KEYS) if m >> i & 1)
+                   for m in range(1 << len(ISSUE_KEYS)))
+_MASK_PRIO = tuple(((m & -m).bit_length() - 1) if m else 99
+                   for m in range(1 << len(ISSUE_KEYS)))
+_MASK_BITS = tuple(tuple(i for i in range(len(ISSUE_KEYS)) if m >> i & 1)
+                   for m in range(1 << len(ISSUE_KEYS)))
+
+CSV_FIELDNAMES = ('Tipo', 'Ruta', 'Nombre', 'LongRuta', 'LongNombre', 'Profundidad', 'Problemas')
+Row = namedtuple('Row', 'tipo ruta nombre long_ruta long_nombre profundidad problemas_mask')
+
+def decode_problems(mask: int) -> str:
+    return _MASK_TEXT[mask]
+
+def _validate_item(name, full, tipo, depth, max_path, max_file_name, max_depth, counts):
+    plen, nlen = len(full), len(name)
+    mask = 0
+
+    if name.isascii():
+        if len(name.encode('ascii').translate(None, _FORBIDDEN_BYTES)) != nlen:
+            mask |= ISSUE_FORBIDDEN; counts['forbidden_chars'] += 1
+    else:
+        marked = name.translate(_CHECK_TABLE)
+        if _MARK_FORBIDDEN in marked:
+            mask |= ISSUE_FORBIDDEN; counts['forbidden_chars'] += 1
+        if _MARK_DIACRITIC in marked:
+            mask |= ISSUE_DIACRITIC; counts['diacritics'] += 1
     if plen > max_path:
-        issues.append('Ruta>MaxPath'); counts['too_long_path'] += 1
+        mask |= ISSUE_PATH; counts['too_long_path'] += 1
     if nlen > max_file_name:
-        issues.append('Nombre>MaxFileName'); counts['too_long_name'] += 1
+        mask |= ISSUE_NAME; counts['too_long_name'] += 1
     if depth > max_depth:
-        issues.append('Profundidad>MaxDepth'); counts['too_deep'] += 1
+        mask |= ISSUE_DEPTH; counts['too_deep'] += 1
     if name in HIDDEN_BASENAMES or name.startswith('~$'):
-        issues.append('Oculto/Temporal'); counts['hidden_temp'] += 1
-
-    order = {'CaracteresProhibidos': 0, 'Diacriticos': 1,
-             'Ruta>MaxPath': 2, 'Nombre>MaxFileName': 3,
-             'Profundidad>MaxDepth': 4, 'Oculto/Temporal': 5}
-    issues.sort(key=lambda x: order.get(x, 99))
-
-    return {
-        'Tipo': tipo,
-        'Ruta': full,
-        'Nombre': name,
-        'LongRuta': plen,
-        'LongNombre': nlen,
-        'Profundidad': depth,
-        'Problemas': ','.join(issues)
-    }
+        mask |= ISSUE_HIDDEN; counts['hidden_temp'] += 1
+
+    return Row(tipo, full, name, plen, nlen, depth, mask)
+
+def new_counts() -> dict:
+    return {'too_long_path': 0, 'too_long_name': 0, 'too_deep': 0,
+            'forbidden_chars': 0, 'diacritics': 0, 'hidden_temp': 0}
+
+def _validate_level(dirpath, depth, dir_entries, file_entries, counts,
+                    max_path, max_file_name, max_depth):
+    """Valida el contenido de un directorio; el directorio mismo ya lo validó su padre."""
+    child_depth = depth + 1
+    if not IS_WINDOWS:
+        # DirEntry.path ya viene armado por scandir
+        for e in dir_entries:
+            yield _validate_item(e.name, e.path, 'DIR',
+                                 child_depth, max_path, max_file_name, max_depth, counts)
+        for e in file_entries:
+            yield _validate_item(e.name, e.path, 'FILE',
+                                 child_depth, max_path, max_file_name, max_depth, counts)
+        return
+    # En Windows DirEntry.path lleva el prefijo \\?\; se reporta la ruta sin él
+    prefix = os.path.join(dirpath, '')   # 'C:\\' ya termina en separador
+    for e in dir_entries:
+        yield _validate_item(e.name, prefix + e.name, 'DIR',
+                             child_depth, max_path, max_file_name, max_depth, counts)
+    for e in file_entries:
+        yield _validate_item(e.name, prefix + e.name, 'FILE',
+                             child_depth, max_path, max_file_name, max_depth, counts)
+
+def _validate_subtree(top, depth, max_path, max_file_name, max_depth, out: queue.Queue):
+    """
+    Valida un subárbol en un hilo y publica sus filas en out por lotes (la cola
+    acotada frena al hilo si el consumidor va atrás); al final publica sus conteos.
+    """
+    counts = new_counts()
+    try:
+        batch = []
+        for level in safe_walk(top, depth):
+            batch.extend(_validate_level(*level, counts, max_path, max_file_name, max_depth))
+            if len(batch) >= SUBTREE_BATCH_ROWS:
+                out.put(batch)
+                batch = []
+        if batch:
+            out.put(batch)
+    finally:
+        out.put(counts)   # fin del subárbol (también si hubo excepción)
+
+def iter_validate(source_folder, counts,
+                  max_path=MAX_PATH_DEFAULT,
+                  max_file_name=MAX_FILE_NAME_DEFAULT,
+                  max_depth=MAX_DEPTH_DEFAULT):
+    """
+    Genera una fila por elemento a medida que se recorre; actualiza counts al vuelo.
+    Con PARALLEL_MIN_SUBTREES o más subcarpetas en la raíz, cada subárbol se recorre
+    en un hilo (scandir libera el GIL) y sus filas se entregan en orden; solo hay
+    tantos subárboles en curso como hilos, así la memoria no crece con el árbol.
+    """
+    source_folder = os.path.abspath(source_folder)
+
+    root_name = os.path.basename(source_folder)
+    if root_name:
+        yield _validate_item(root_name, source_folder, 'DIR',
+                             0, max_path, max_file_name, max_depth, counts)
+
+    walk = safe_walk(source_folder)
+    first = next(walk, None)
+    if first is None:
+        return
+    yield from _validate_level(*first, counts, max_path, max_file_name, max_depth)
+
+    _, depth, dir_entries, _ = first
+    if len(dir_entries) < PARALLEL_MIN_SUBTREES:
+        for level in walk:
+            yield from _validate_level(*level, counts, max_path, max_file_name, max_depth)
+        return
+
+    walk.close()
+    workers = min(32, (os.cpu_count() or 4) * 2)
+    tops = iter([e for e in dir_entries if not _is_link(e)])
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        pending = deque()
+
+        def submit(e):
+            q = queue.Queue(maxsize=SUBTREE_QUEUE_BATCHES)
+            pending.append((ex.submit(_validate_subtree, e.path, depth + 1,
+                                      max_path, max_file_name, max_depth, q), q))
+
+        for e in tops:
+            submit(e)
+            if len(pending) == workers:
+                break
+        try:
+            while pending:
+                fut, q = pending[0]
+                item = q.get()
+                while not isinstance(item, dict):   # el dict de conteos cierra el subárbol
+                    yield from item
+                    item = q.get()
+                pending.popleft()
+                fut.result()
+                for k, v in item.items():
+                    counts[k] += v
+                e = next(tops, None)
+                if e is not None:
+                    submit(e)
+        finally:
+            # Si el consumidor corta antes, se vacían las colas para liberar los hilos
+            for _, q in pending:
+                while not isinstance(q.get(), dict):
+                    pass
+
+def row_priority(row):
+    return (_MASK_PRIO[row.problemas_mask], -row.long_ruta)
 
 def validate_folder(source_folder,
                     max_path=MAX_PATH_DEFAULT,
                     max_file_name=MAX_FILE_NAME_DEFAULT,
                     max_depth=MAX_DEPTH_DEFAULT):
-    results = []
-    counts = {'too_long_path': 0, 'too_long_name': 0, 'too_deep': 0,
-              'forbidden_chars': 0, 'diacritics': 0, 'hidden_temp': 0}
-
-    forbidden_re = re.compile(FORBIDDEN_CHARS_PATTERN)
-    diacritics_re = re.compile(DIACRITIC_CHARS_PATTERN, re.UNICODE)
-    source_folder = os.path.abspath(source_folder)
-
-    for dirpath, dirnames, filenames in safe_walk(source_folder):
-        current_dir_name = os.path.basename(dirpath)
-        if current_dir_name:
-            results.append(_validate_item(current_dir_name, dirpath, 'DIR',
-                                          source_folder, max_path, max_file_name, max_depth,
-                                          forbidden_re, diacritics_re, counts))
-        for d in dirnames:
-            results.append(_validate_item(d, os.path.join(dirpath, d), 'DIR',
-                                          source_folder, max_path, max_file_name, max_depth,
-                                          forbidden_re, diacritics_re, counts))
-        for fn in filenames:
-            results.append(_validate_item(fn, os.path.join(dirpath, fn), 'FILE',
-                                          source_folder, max_path, max_file_name, max_depth,
-                                          forbidden_re, diacritics_re, counts))
-
-    def prio(row):
-        probs = row.get('Problemas') or ''
-        keys = ['CaracteresProhibidos','Diacriticos','Ruta>MaxPath',
-                'Nombre>MaxFileName','Profundidad>MaxDepth','Oculto/Temporal']
-        idx = min([keys.index(k) for k in keys if k in probs] or [99])
-        return (idx, -row.get('LongRuta', 0))
-    results.sort(key=prio)
+    counts = new_counts()
+    results = list(iter_validate(source_folder, counts, max_path, max_file_name, max_depth))
+    results.sort(key=row_priority)
     return results, counts
 
 # ======= Reportes =======
 def save_reports(results, counts, out_dir: Path,
                  max_path, max_file_name, max_depth, selected_root):
+    """
+    results puede ser una lista o el generador de iter_validate: el CSV se
+    escribe fila a fila y en memoria solo quedan las filas con problemas.
+    counts debe ser el mismo dict que alimenta el generador.
+    """
     out_dir.mkdir(parents=True, exist_ok=True)
 
     csv_path = out_dir / f"{PROJECT_NAME}.csv"
     html_path = out_dir / f"{PROJECT_NAME}.html"
 
-    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=[
-            'Tipo','Ruta','Nombre','LongRuta','LongNombre','Profundidad','Problemas'
-        ])
-        writer.writeheader()
-        writer.writerows(results)
-
-    def filter_by(key): return [r for r in results if key in (r['Problemas'] or '')]
-    forbidden_rows  = filter_by('CaracteresProhibidos')
-    diacritics_rows = filter_by('Diacriticos')
-    path_rows       = filter_by('Ruta>MaxPath')
-    name_rows       = filter_by('Nombre>MaxFileName')
-    depth_rows      = filter_by('Profundidad>MaxDepth')
-    hidden_rows     = filter_by('Oculto/Temporal')
-
-    def render_table(title, rows):
+    with open(csv_path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDNAMES)
+        total = 0
+        problematic = 0
+        buckets = tuple([] for _ in ISSUE_KEYS)
+        for r in results:
+            writer.writerow((r.tipo, r.ruta, r.nombre, r.long_ruta, r.long_nombre,
+                             r.profundidad, _MASK_TEXT[r.problemas_mask]))
+            total += 1
+            if r.problemas_mask:
+                problematic += 1
+                for i in _MASK_BITS[r.problemas_mask]:
+                    buckets[i].append(r)
+    for rows in buckets:
+        rows.sort(key=row_priority)
+
+    # Ruta/Nombre escapados una sola vez aunque la fila salga en varias tablas
+    escaped = {}
+
+    def render_table_to(write, title, rows):
+        """Escribe la tabla fila a fila en lugar de armarla completa en memoria."""
         if not rows:
-            return f"<h3>{title}</h3><p><em>Sin incidencias.</em></p>"
-        body = "".join(
-            f"<tr><td>{i}</td><td>{r['Tipo']}</td>"
-            f"<td><code>{r['Ruta']}</code></td>"
-            f"<td><code>{r['Nombre']}</code></td>"
-            f"<td>{r['Problemas']}</td></tr>"
-            for i, r in enumerate(rows, 1)
-        )
-        return (
+            write(f"<h3>{title}</h3><p><em>Sin incidencias.</em></p>")
+            return
+        write(
             f"<h3>{title}</h3>"
             f"<table><thead><tr>"
             f"<th>#</th><th>Tipo</th><th>Ruta</th><th>Nombre</th><th>Problemas</th>"
-            f"</tr></thead><tbody>{body}</tbody></table>"
+            f"</tr></thead><tbody>"
         )
+        for i, r in enumerate(rows, 1):
+            esc = escaped.get(r.ruta)
+            if esc is None:
+                esc = escaped[r.ruta] = (html.escape(r.ruta), html.escape(r.nombre))
+            write("".join(("<tr><td>", str(i), "</td><td>", r.tipo,
+                           "</td><td><code>", esc[0],
+                           "</code></td><td><code>", esc[1],
+                           "</code></td><td>", _MASK_TEXT[r.problemas_mask], "</td></tr>")))
+        write("</tbody></table>")
 
-    total = len(results)
-    problematic = sum(1 for r in results if r['Problemas'])
     ok = total - problematic
 
-    html = f"""<!doctype html>
+    header = f"""<!doctype html>
 <html lang="es"><head>
 <meta charset="utf-8">
 <title>{PROJECT_NAME} - Resumen</title>
@@ -195,7 +349,7 @@ code {{ background:#f1f1f1; padding:2px 4px; border-radius:4px; }}
 </style></head><body>
 
 <h1>{PROJECT_NAME} - Resumen de validación</h1>
-<p><strong>Carpeta seleccionada:</strong> <code>{selected_root}</code></p>
+<p><strong>Carpeta seleccionada:</strong> <code>{html.escape(str(selected_root))}</code></p>
 
 <div class="stats">
   <span class="total">Total elementos: <strong class="total">{total}</strong></span>
@@ -205,8 +359,8 @@ code {{ background:#f1f1f1; padding:2px 4px; border-radius:4px; }}
 
 <h2>Parámetros</h2>
 <ul>
-  <li>Caracteres prohibidos (regex): <code>{FORBIDDEN_CHARS_PATTERN}</code></li>
-  <li>Diacríticos (regex): <code>{DIACRITIC_CHARS_PATTERN}</code></li>
+  <li>Caracteres prohibidos (regex): <code>{html.escape(FORBIDDEN_CHARS_PATTERN)}</code></li>
+  <li>Diacríticos (regex): <code>{html.escape(DIACRITIC_CHARS_PATTERN)}</code></li>
   <li>MaxPath: <code>{max_path}</code></li>
   <li>MaxFileName: <code>{max_file_name}</code></li>
   <li>MaxDepth: <code>{max_depth}</code></li>
@@ -224,16 +378,17 @@ code {{ background:#f1f1f1; padding:2px 4px; border-radius:4px; }}
 </table>
 
 <h2>Detalles</h2>
-<div>{render_table("Caracteres prohibidos", forbidden_rows)}</div>
-<div>{render_table("Diacríticos", diacritics_rows)}</div>
-<div>{render_table("Ruta > MaxPath", path_rows)}</div>
-<div>{render_table("Nombre > MaxFileName", name_rows)}</div>
-<div>{render_table("Profundidad > MaxDepth", depth_rows)}</div>
-<div>{render_table("Ocultos / Temporales", hidden_rows)}</div>
-
-</body></html>"""
-    with open(html_path, 'w', encoding='utf-8') as f:
-        f.write(html)
+"""
+    section_titles = ("Caracteres prohibidos", "Diacríticos", "Ruta > MaxPath",
+                      "Nombre > MaxFileName", "Profundidad > MaxDepth", "Ocultos / Temporales")
+    with open(html_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        write = f.write
+        write(header)
+        for title, rows in zip(section_titles, buckets):
+            write("<div>")
+            render_table_to(write, title, rows)
+            write("</div>\n")
+        write("\n</body></html>")
 
     return csv_path, html_path
 
@@ -246,7 +401,8 @@ def run_gui():
     if not selected:
         return
     try:
-        results, counts = validate_folder(selected)
+        counts = new_counts()
+        results = iter_validate(selected, counts)
 
         parent = Path(selected).resolve().parent
         stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -257,13 +413,8 @@ def run_gui():
             MAX_PATH_DEFAULT, MAX_FILE_NAME_DEFAULT, MAX_DEPTH_DEFAULT, selected
         )
 
-        # --- Apertura robusta del HTML ---
+        # --- Apertura robusta del HTML (save_reports ya cerró el archivo: no hay que esperarlo) ---
         try:
-            for _ in range(10):
-                if Path(html_path).exists():
-                    break
-                time.sleep(0.2)
-
             opened = False
             try:
                 opened = webbrowser.open(Path(html_path).resolve().as_uri(), new=2)
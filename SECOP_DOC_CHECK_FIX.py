@@ -12,8 +12,13 @@ SECOP II DOC CHECK & FIX
 - Reportes HTML: INICIAL, CORREGIDO, FINAL (incluye “Archivos omitidos”)
 """
 
-import os, re, sys, platform, webbrowser, subprocess, time, shutil, unicodedata, glob, tempfile, textwrap, importlib.util
+import os, re, sys, csv, platform, webbrowser, subprocess, time, shutil, unicodedata, tempfile, queue
+import atexit, threading
+from collections import Counter, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
+from functools import lru_cache
+from html import escape
 from pathlib import Path
 from typing import Optional, Tuple, Callable
 import tkinter as tk
@@ -23,6 +28,7 @@ from tkinter import filedialog, messagebox, ttk
 def _tk_fix_meipass():
     """Ajusta TCL/TK si el exe corre con --onefile. No es obligatorio con _tk_data, pero no estorba."""
     if getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS"):
+        import glob
         base = os.path.join(sys._MEIPASS, "_tk_data")
         for pat, env in (("tcl8.*", "TCL_LIBRARY"), ("tk8.*", "TK_LIBRARY")):
             hits = sorted(glob.glob(os.path.join(base, pat)), reverse=True)
@@ -46,23 +52,46 @@ GENERATE_CSV_REPORTS = False
 GENERATE_MAPPING_CSV = False
 
 NON_PDF_DUMP_NAME = "FORMATO DIFERENTE A PDF"
+# Carpetas que genera esta herramienta: si quedan dentro de la carpeta elegida
+# (p. ej. se elige el padre de una ejecución anterior) no se validan ni se copian
+SKIP_DIR_NAMES = frozenset({REPORT_FOLDER_NAME, NON_PDF_DUMP_NAME})
 
 # Timeouts conversores
 TIMEOUT_SOFFICE = 180
 TIMEOUT_CHROME  = 120
 TIMEOUT_WKHTML  = 90
+CMD_WAIT_SLICE  = 0.1   # s entre bombeos de UI mientras corre un conversor
+
+# LibreOffice: archivos por invocación y perfil propio (en el temporal del sistema)
+SOFFICE_BATCH_SIZE = 10
+SOFFICE_PROFILE_NAME = "secop_doc_check_lo"
+CHROME_PROFILE_NAME = "secop_doc_check_chrome"
+SOFFICE_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))   # soffice simultáneos
+
+# Nombres saneados en memoria: las carpetas se repiten bajo muchos padres y, con una
+# caché chica, los nombres únicos de archivo la vaciaban antes de volver a usarlos
+NAME_CACHE_SIZE = 100_000
+
+# Recorridos (conteo, poda) en paralelo solo si la raíz tiene al menos estas subcarpetas
+PARALLEL_MIN_SUBTREES = 4
 
 # Copia no bloqueante
 CHUNK_SIZE   = 1 * 1024 * 1024   # 1 MB -> UI mucho más fluida
 TIMEOUT_COPY = 120               # s antes de preguntar por copia lenta
+UI_REFRESH_SEC = 1 / 30          # s mínimos entre refrescos de progreso (copia y barras)
+COPY_WORKERS = 8                 # copias simultáneas de PDFs pequeños (<= CHUNK_SIZE)
+COPY_QUEUE_DEPTH = 64            # copias pequeñas en vuelo como máximo
+CONVERT_WORKERS = max(1, min(4, os.cpu_count() or 1))   # conversiones no-Office simultáneas
+IS_WINDOWS = platform.system() == "Windows"   # una vez al cargar: se consulta por archivo
+# Linux: lectura anticipada por carpeta en orden de inodo (menos saltos en discos mecánicos)
+PREFETCH_INODE_ORDER = platform.system() == "Linux" and hasattr(os, "posix_fadvise")
+PREFETCH_MAX_FILE = 32 * 1024 * 1024    # archivos mayores los lee la copia, sin adelanto
+PREFETCH_MAX_DIR = 128 * 1024 * 1024    # bytes adelantados por carpeta como máximo
 
 # Validación
 FORBIDDEN_CHARS_PATTERN = r'[\\/:*?"<>|%&#+\{\}\[\];,=]'
-DIACRITIC_CHARS_PATTERN  = r'[áéíóúüÁÉÍÓÚÜñÑçÇãÃõÕ]'
-HIDDEN_BASENAMES = {'Thumbs.db', '.DS_Store', '.ds_store', 'desktop.ini'}
-
-FORBIDDEN_RE = re.compile(FORBIDDEN_CHARS_PATTERN)
-DIACRITICS_RE = re.compile(DIACRITIC_CHARS_PATTERN, re.UNICODE)
+FORBIDDEN_SET = frozenset('\\/:*?"<>|%&#+{}[];,=')   # mismos caracteres que el patrón
+HIDDEN_BASENAMES = frozenset({'Thumbs.db', '.DS_Store', '.ds_store', 'desktop.ini'})
 
 IMG_EXTS  = {'.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.gif', '.webp'}
 TXT_EXTS  = {'.txt', '.csv', '.md', '.log'}
@@ -70,8 +99,13 @@ HTML_EXTS = {'.html', '.htm'}
 OFFICE_EXTS = {'.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.odt', '.ods', '.odp', '.rtf'}
 
 # ======= UI helpers =======
+def _on_ui_thread() -> bool:
+    return threading.current_thread() is threading.main_thread()
+
 def _ui_pump():
-    """Bombea la UI agresivamente para evitar 'Not Responding'."""
+    """Bombea la UI agresivamente para evitar 'Not Responding'. Fuera del hilo de Tk no hace nada."""
+    if not _on_ui_thread():
+        return
     try:
         if tk._default_root is not None:
             tk._default_root.update_idletasks()
@@ -79,61 +113,225 @@ def _ui_pump():
     except Exception:
         pass
 
-def run_cmd_with_timeout_ex(cmd, timeout_sec: int) -> Tuple[bool, bool]:
-    """Ejecuta comando externo con bombeo de UI. -> (ok, timed_out)."""
+# Llamadas que un hilo de trabajo necesita hacer en el hilo de Tk (diálogos, COM)
+_UI_CALLS: "queue.Queue[tuple]" = queue.Queue()
+
+def _ui_call(fn, *args):
+    """
+    Ejecuta fn(*args) en el hilo de Tk y devuelve su resultado (o relanza su excepción).
+    Desde otro hilo, la llamada espera a que el hilo de Tk la atienda con _serve_ui_calls.
+    """
+    if _on_ui_thread():
+        return fn(*args)
+    done, box = threading.Event(), []
+    _UI_CALLS.put((fn, args, box, done))
+    done.wait()
+    ok, value = box[0]
+    if not ok:
+        raise value
+    return value
+
+def _serve_ui_calls():
+    """Atiende (desde el hilo de Tk) las llamadas pendientes de _ui_call."""
+    while True:
+        try:
+            fn, args, box, done = _UI_CALLS.get_nowait()
+        except queue.Empty:
+            return
+        try:
+            box.append((True, fn(*args)))
+        except BaseException as e:
+            box.append((False, e))
+        done.set()
+
+def _run_in_worker(root, fn, *args, on_tick: Optional[Callable[[], None]] = None):
+    """
+    Ejecuta fn(*args) en un hilo sin congelar Tk: cada UI_REFRESH_SEC se llama on_tick
+    y se atienden los _ui_call del hilo. Devuelve el resultado o relanza su excepción.
+    """
+    outcome = []
+    finished = tk.BooleanVar(master=root, value=False)
+
+    def worker():
+        try:
+            outcome.append((True, fn(*args)))
+        except BaseException as e:
+            outcome.append((False, e))
+
+    def tick():
+        ended = bool(outcome)   # antes de on_tick: sus últimos eventos ya están publicados
+        if on_tick:
+            on_tick()
+        _serve_ui_calls()
+        if ended:
+            finished.set(True)
+        else:
+            root.after(int(UI_REFRESH_SEC * 1000), tick)
+
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(int(UI_REFRESH_SEC * 1000), tick)
+    root.wait_variable(finished)
+    del tick, finished   # la variable Tcl se libera aquí, en el hilo de Tk, y no en un GC de otro hilo
+    ok, value = outcome[0]
+    if not ok:
+        raise value
+    return value
+
+def run_cmd_with_timeout_ex(cmd, timeout_sec: int, pump_ui: bool = True,
+                            progress: Optional[Callable[[], int]] = None) -> Tuple[bool, bool]:
+    """
+    Ejecuta comando externo. -> (ok, timed_out).
+    La espera la hace el SO (Popen.wait); con pump_ui (solo desde el hilo de Tk) se
+    espera por tramos de CMD_WAIT_SLICE y se bombea la UI entre tramos.
+    Con progress (contador de avance) el plazo es sin avance: timeout_sec se cuenta
+    desde el último cambio del contador.
+    La salida va a DEVNULL: un PIPE sin leer puede llenarse y bloquear al conversor.
+    """
     try:
-        p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        p = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
     except Exception:
         return False, False
-    t0 = time.time()
+    pump_ui = pump_ui and _on_ui_thread()
+    sliced = pump_ui or progress is not None
+    last = progress() if progress else None
+    deadline = time.monotonic() + timeout_sec
     while True:
-        _ui_pump()
-        ret = p.poll()
-        if ret is not None:
+        remaining = max(0.0, deadline - time.monotonic())
+        try:
+            ret = p.wait(timeout=min(remaining, CMD_WAIT_SLICE) if sliced else remaining)
             return (ret == 0), False
-        if time.time() - t0 > timeout_sec:
-            try: p.kill()
-            except Exception: pass
+        except subprocess.TimeoutExpired:
+            pass
+        if progress is not None:
+            now = progress()
+            if now != last:
+                last, deadline = now, time.monotonic() + timeout_sec
+        if time.monotonic() >= deadline:
+            try:
+                p.kill(); p.wait(timeout=5)
+            except Exception:
+                pass
             return False, True
-        time.sleep(0.05)
+        if pump_ui:
+            _ui_pump()
 
 # ======= Path helpers =======
-def safe_walk(root: str):
-    """os.walk tolerante a rutas largas en Windows."""
-    if platform.system() == 'Windows':
-        def add_prefix(p):
-            p = os.path.abspath(p)
-            if p.startswith('\\\\?\\') or p.startswith('\\\\.\\'): return p
-            if p.startswith('\\\\'): return '\\\\?\\UNC\\' + p[2:]
-            return '\\\\?\\' + p
-        try:
-            for dirpath, dirnames, filenames in os.walk(add_prefix(root)):
-                if dirpath.startswith('\\\\?\\UNC\\'):
-                    dirpath = '\\\\' + dirpath[8:]
-                elif dirpath.startswith('\\\\?\\'):
-                    dirpath = dirpath[4:]
-                yield dirpath, dirnames, filenames
-            return
-        except Exception:
-            pass
-    for dirpath, dirnames, filenames in os.walk(root):
-        yield dirpath, dirnames, filenames
+_LONG_PREFIXES = ('\\\\?\\', '\\\\.\\')
 
 def longpath(p: Path) -> str:
-    if platform.system() != 'Windows': return str(p)
-    ab = os.path.abspath(str(p))
-    if ab.startswith('\\\\?\\') or ab.startswith('\\\\.\\'): return ab
+    if not IS_WINDOWS: return os.fspath(p)
+    ab = os.path.abspath(p)
+    if ab.startswith(_LONG_PREFIXES): return ab
     if ab.startswith('\\\\'): return '\\\\?\\UNC\\' + ab[2:]
     return '\\\\?\\' + ab
 
+def shortpath(p: str) -> str:
+    """Inverso de longpath: quita el prefijo \\\\?\\ (para mostrar y medir rutas)."""
+    if p.startswith('\\\\?\\UNC\\'): return '\\\\' + p[8:]
+    if p.startswith('\\\\?\\'): return p[4:]
+    return p
+
+# Windows lista sin prefijo \\?\ carpetas de hasta 247 caracteres (248 con el nulo)
+_SHORT_DIR_MAX = 247
+
+def _walk_path(p: str) -> str:
+    """Ruta para os.scandir: el prefijo \\\\?\\ solo en carpetas largas (la mayoría no lo paga)."""
+    if IS_WINDOWS and len(p) > _SHORT_DIR_MAX and not p.startswith(_LONG_PREFIXES):
+        return longpath(p)
+    return p
+
+def _scandir_walk(root: str):
+    """
+    os.walk (de arriba abajo, sin seguir enlaces) tolerante a rutas largas en Windows;
+    produce (dirpath, dirs, files) con listas de os.DirEntry, de modo que tipo y tamaño
+    salen del listado (en Windows, sin stat adicional). dirpath lleva el prefijo de
+    longpath solo si la carpeta lo necesita (shortpath lo quita); quitar entradas de
+    dirs evita descender en ellas.
+    """
+    stack = [_walk_path(shortpath(longpath(root)))]
+    while stack:
+        d = stack.pop()
+        try:
+            it = os.scandir(d)
+        except OSError:
+            continue
+        dirs, files = [], []
+        with it:
+            try:
+                for e in it:
+                    try:
+                        is_dir = e.is_dir()
+                    except OSError:
+                        is_dir = False
+                    (dirs if is_dir else files).append(e)
+            except OSError:
+                pass   # listado cortado a medias (red, E/S): se sigue con lo ya leído
+        yield d, dirs, files
+        stack.extend(_walk_path(e.path) for e in reversed(dirs) if not _is_link(e))
+
+def _is_link(e: os.DirEntry) -> bool:
+    try:
+        return e.is_symlink()
+    except OSError:
+        return True   # como os.walk: ante la duda no se desciende
+
+def _entry_size_bytes(e: os.DirEntry) -> int:
+    try:
+        return e.stat().st_size
+    except OSError:
+        return 0
+
+TreeStats = namedtuple('TreeStats', 'files size')
+
+_CORRECTED_ROOT_RE = re.compile(r'[a-z0-9]*corregido\d*' + re.escape(SUFFIX_C))
+
+def _previous_outputs(names) -> set:
+    """
+    Salidas de una ejecución anterior entre las subcarpetas names: reportes, dump NO-PDF
+    y, solo si están junto a alguno de ellos, raíces corregidas (<saneado>corregido[n]C).
+    Sin ese vecino, un "corregidoC" es una carpeta del usuario (p. ej. "Corregido" saneada).
+    """
+    found = {n for n in names if n in SKIP_DIR_NAMES}
+    if found:
+        found.update(n for n in names if _CORRECTED_ROOT_RE.fullmatch(n))
+    return found
+
+def _skip_previous_outputs(dirs: list):
+    """Poda en sitio los DirEntry de _scandir_walk: no desciende en lo que se quita."""
+    drop = _previous_outputs([e.name for e in dirs])
+    if drop:
+        dirs[:] = [e for e in dirs if e.name not in drop]
+
 # ======= Nombre saneado =======
+# Marcas combinantes (bloques Unicode de diacríticos) a eliminar tras NFD
+_COMBINING_DELETE_TABLE = dict.fromkeys(
+    c for lo, hi in ((0x0300, 0x0370), (0x1AB0, 0x1B00), (0x1DC0, 0x1E00),
+                     (0x20D0, 0x2100), (0xFE20, 0xFE30))
+    for c in range(lo, hi))
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
 def remove_diacritics(s: str) -> str:
-    return ''.join(c for c in unicodedata.normalize('NFD', s) if not unicodedata.combining(c))
+    if s.isascii():
+        return s
+    n = unicodedata.normalize('NFD', s)
+    t = n.translate(_COMBINING_DELETE_TABLE)
+    # Nada quitado: se devuelve el original (NFC), no su forma descompuesta
+    return s if len(t) == len(n) else t
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def has_diacritics(s: str) -> bool:
+    if s.isascii():
+        return False
+    return any(unicodedata.combining(c) for c in unicodedata.normalize('NFD', s))
 
+# Bytes ASCII que NO son [a-z0-9]: se borran de una vez con bytes.translate
+_NON_ALNUM_ASCII = bytes(b for b in range(128) if not (0x61 <= b <= 0x7A or 0x30 <= b <= 0x39))
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
 def sanitize_component_letters_digits(name: str) -> str:
-    s = remove_diacritics(name).lower()
-    s = s.replace(' ', '')
-    s = re.sub(r'[^a-z0-9]', '', s)
+    s = (name if name.isascii() else remove_diacritics(name)).lower()
+    # Una pasada en C: lo no ASCII cae en encode('ignore') y el resto en translate
+    s = s.encode('ascii', 'ignore').translate(None, _NON_ALNUM_ASCII).decode('ascii')
     return s or 'a'
 
 sanitize_component_strict = sanitize_component_letters_digits
@@ -145,63 +343,96 @@ def limit_filename(name: str, max_len: int) -> str:
     if keep < 1: return (base + ext)[:max_len]
     return (base[:keep] or "a") + ext
 
+# ======= Nombres ocupados por carpeta destino =======
+# Cada carpeta se lista UNA vez (os.listdir) y luego se mantiene en memoria: quien crea
+# una carpeta o reserva un archivo llama _mark_used; quien lo borra, _mark_free.
+_used_names: dict[str, set] = {}
+_fold = str.lower if IS_WINDOWS else str   # Windows no distingue mayúsculas
+
+def _names_in(d: Path) -> set:
+    key = str(d)
+    names = _used_names.get(key)
+    if names is None:
+        try:
+            names = {_fold(n) for n in os.listdir(longpath(d))}
+        except OSError:
+            names = set()
+        _used_names[key] = names
+    return names
+
+def _mark_used(p: Path):
+    """Registra p (y los padres recién creados por mkdir -p) en las carpetas ya listadas."""
+    while p.name:
+        names = _used_names.get(str(p.parent))
+        if names is not None:
+            k = _fold(p.name)
+            if k in names:
+                return
+            names.add(k)
+        p = p.parent
+
+def _mark_free(p: Path):
+    names = _used_names.get(str(p.parent))
+    if names is not None:
+        names.discard(_fold(p.name))
+
 def ensure_unique_preserving_C(target_dir: Path, name: str) -> str:
     base, ext = (os.path.splitext(name) if "." in name and not name.startswith(".") else (name, ""))
     has_c = base.endswith(SUFFIX_C)
     core = base[:-len(SUFFIX_C)] if has_c else base
     suffix = SUFFIX_C if has_c else ""
+    used = _names_in(target_dir)
     cand = limit_filename(core + suffix + ext, MAX_FILE_NAME_DEFAULT)
     i = 2
-    while (target_dir / cand).exists():
+    while _fold(cand) in used:
         cand = limit_filename(f"{core}{i}{suffix}{ext}", MAX_FILE_NAME_DEFAULT); i += 1
     return cand
 
 def ensure_unique_generic(target_dir: Path, name: str) -> str:
     base, ext = (os.path.splitext(name) if "." in name and not name.startswith(".") else (name, ""))
+    used = _names_in(target_dir)
     cand = limit_filename(base + ext, MAX_FILE_NAME_DEFAULT)
     i = 2
-    while (target_dir / cand).exists():
+    while _fold(cand) in used:
         cand = limit_filename(f"{base}{i}{ext}", MAX_FILE_NAME_DEFAULT); i += 1
     return cand
 
 # ======= Métricas relativas =======
-def _rel_len(full_path: str, root: str) -> int:
-    rel = os.path.relpath(full_path, root)
-    return 0 if rel in ('.', '') else len(rel)
-
-def _rel_join_len(dir_path: Path, name: str, base_root: Path) -> int:
-    rel_dir = os.path.relpath(str(dir_path), str(base_root))
-    if rel_dir in ('.', ''):
-        return len(name)
-    return len(rel_dir) + 1 + len(name)
+def _rel_dir_len(dir_path: Path, floor_dir: Path) -> int:
+    """Longitud de dir_path relativa a floor_dir (0 si es el mismo); dir_path cuelga de floor_dir."""
+    d, f = str(dir_path), str(floor_dir)
+    return len(d) - len(f) - 1 if len(d) > len(f) else 0
 
 def rel_depth(full_path: str, root: str) -> int:
     rel = os.path.relpath(full_path, root)
     if rel in ('.', ''): return 0
-    return len([p for p in re.split(r'[\\/]+', rel) if p])
+    return rel.count(os.sep) + 1   # relpath ya normaliza: un único separador entre partes
 
 def bubble_dir_for_maxdepth(target_dir: Path, floor_dir: Path) -> Path:
-    while rel_depth(str(target_dir), str(floor_dir)) > MAX_DEPTH_DEFAULT and target_dir != floor_dir:
-        target_dir = target_dir.parent
+    depth = rel_depth(str(target_dir), str(floor_dir))
+    while depth > MAX_DEPTH_DEFAULT and target_dir != floor_dir:
+        target_dir = target_dir.parent; depth -= 1
     return target_dir
 
 def bubble_file_for_maxdepth(target_dir: Path, floor_dir: Path) -> Path:
-    while (rel_depth(str(target_dir), str(floor_dir)) + 1) > MAX_DEPTH_DEFAULT and target_dir != floor_dir:
-        target_dir = target_dir.parent
+    depth = rel_depth(str(target_dir), str(floor_dir))
+    while (depth + 1) > MAX_DEPTH_DEFAULT and target_dir != floor_dir:
+        target_dir = target_dir.parent; depth -= 1
     return target_dir
 
 def fit_in_maxpath_bubbling(target_dir: Path, floor_dir: Path, name: str, keep_C_suffix: bool):
     def _ensure_unique(d: Path, n: str) -> str:
         return ensure_unique_preserving_C(d, n) if keep_C_suffix else ensure_unique_generic(d, n)
 
+    # Longitud relativa de la carpeta: se calcula una vez y al subir se resta el último componente
     cur_dir, cur_name = target_dir, name
-    while _rel_join_len(cur_dir, cur_name, floor_dir) > MAX_PATH_DEFAULT and cur_dir != floor_dir:
+    rel_dir_len = _rel_dir_len(cur_dir, floor_dir)
+    while rel_dir_len + (1 if rel_dir_len else 0) + len(cur_name) > MAX_PATH_DEFAULT and cur_dir != floor_dir:
+        rel_dir_len = max(0, rel_dir_len - len(cur_dir.name) - 1)
         cur_dir = cur_dir.parent
         cur_name = _ensure_unique(cur_dir, cur_name)
 
-    if _rel_join_len(cur_dir, cur_name, floor_dir) > MAX_PATH_DEFAULT:
-        rel_dir = os.path.relpath(str(cur_dir), str(floor_dir))
-        rel_dir_len = 0 if rel_dir in ('.', '') else len(rel_dir)
+    if rel_dir_len + (1 if rel_dir_len else 0) + len(cur_name) > MAX_PATH_DEFAULT:
         sep = 0 if rel_dir_len == 0 else 1
         allowed = MAX_PATH_DEFAULT - rel_dir_len - sep
         if allowed < 1: allowed = 1
@@ -222,58 +453,117 @@ def fit_dirname_in_maxpath_bubbling(parent_dir: Path, floor_dir: Path, name: str
     return fit_in_maxpath_bubbling(parent_dir, floor_dir, name, keep_C_suffix=True)
 
 # ======= Validación =======
-def _validate_item(name, full, tipo, root, counts):
-    plen = _rel_len(full, root)
+# Problemas en orden de prioridad: bit i de 'Mask' <-> _ISSUE_NAMES[i]
+_ISSUE_NAMES = ('CaracteresProhibidos', 'Diacríticos', 'Ruta>MaxPath',
+                'Nombre>MaxFileName', 'Profundidad>MaxDepth', 'Oculto/Temporales')
+_MASK_TEXT = tuple(','.join(n for i, n in enumerate(_ISSUE_NAMES) if m >> i & 1)
+                   for m in range(1 << len(_ISSUE_NAMES)))
+
+def _validate_item(name, full, tipo, plen, depth, counts):
     nlen = len(name)
-    depth = rel_depth(full, root)
 
-    issues = []
-    if FORBIDDEN_RE.search(name):
-        issues.append('CaracteresProhibidos'); counts['forbidden_chars'] += 1
-    if DIACRITICS_RE.search(name):
-        issues.append('Diacríticos'); counts['diacritics'] += 1
+    mask = 0
+    if not FORBIDDEN_SET.isdisjoint(name):
+        mask |= 1; counts['forbidden_chars'] += 1
+    if not name.isascii() and has_diacritics(name):   # ASCII: sin NFD ni llamada
+        mask |= 2; counts['diacritics'] += 1
     if plen > MAX_PATH_DEFAULT:
-        issues.append('Ruta>MaxPath'); counts['too_long_path'] += 1
+        mask |= 4; counts['too_long_path'] += 1
     if nlen > MAX_FILE_NAME_DEFAULT:
-        issues.append('Nombre>MaxFileName'); counts['too_long_name'] += 1
+        mask |= 8; counts['too_long_name'] += 1
     if depth > MAX_DEPTH_DEFAULT:
-        issues.append('Profundidad>MaxDepth'); counts['too_deep'] += 1
+        mask |= 16; counts['too_deep'] += 1
     if name in HIDDEN_BASENAMES or name.startswith('~$'):
-        issues.append('Oculto/Temporales'); counts['hidden_temp'] += 1
+        mask |= 32; counts['hidden_temp'] += 1
 
-    order = {'CaracteresProhibidos': 0, 'Diacríticos': 1, 'Ruta>MaxPath': 2,
-             'Nombre>MaxFileName': 3, 'Profundidad>MaxDepth': 4, 'Oculto/Temporales': 5}
-    issues.sort(key=lambda x: order.get(x, 99))
+    # Prioridad = bit más bajo encendido (primer problema en _ISSUE_NAMES)
     return {'Tipo': tipo, 'Ruta': full, 'Nombre': name,
             'LongRuta': plen, 'LongNombre': nlen,
-            'Profundidad': depth, 'Problemas': ','.join(issues)}
+            'Profundidad': depth, 'Problemas': _MASK_TEXT[mask], 'Mask': mask,
+            'PrioIdx': (mask & -mask).bit_length() - 1 if mask else 99}
 
-def validate_folder(source_folder):
-    results = []
-    counts = {'too_long_path': 0, 'too_long_name': 0, 'too_deep': 0,
-              'forbidden_chars': 0, 'diacritics': 0, 'hidden_temp': 0}
-    source_folder = os.path.abspath(source_folder)
-    for dirpath, dirnames, filenames in safe_walk(source_folder):
+def _new_counts() -> dict:
+    return {'too_long_path': 0, 'too_long_name': 0, 'too_deep': 0,
+            'forbidden_chars': 0, 'diacritics': 0, 'hidden_temp': 0}
+
+def _validate_levels(levels, source_folder, counts, results) -> TreeStats:
+    """
+    Valida los niveles de _scandir_walk y, en la misma pasada, suma archivos visibles
+    y bytes (como tree_stats): el tamaño sale del DirEntry ya listado.
+    """
+    files = size = 0
+    # Longitud y profundidad relativas por corte de cadena: relpath una vez por carpeta sobra
+    prefix = os.path.join(source_folder, '')
+    for d, dirs, entries in levels:
+        dirpath = shortpath(d)
+        rel = dirpath[len(prefix):] if dirpath.startswith(prefix) else ''
+        rel_len = len(rel) + 1 if rel else 0          # + separador de los hijos
+        depth = rel.count(os.sep) + 1 if rel else 0
         current_dir_name = os.path.basename(dirpath)
         if current_dir_name:
-            results.append(_validate_item(current_dir_name, dirpath, 'DIR', source_folder, counts))
-        for d in dirnames:
-            results.append(_validate_item(d, os.path.join(dirpath, d), 'DIR', source_folder, counts))
-        for fn in filenames:
-            results.append(_validate_item(fn, os.path.join(dirpath, fn), 'FILE', source_folder, counts))
-    def prio(row):
-        probs = row.get('Problemas') or ''
-        keys = ['CaracteresProhibidos','Diacríticos','Ruta>MaxPath','Nombre>MaxFileName','Profundidad>MaxDepth','Oculto/Temporales']
-        idx = min([keys.index(k) for k in keys if k in probs] or [99])
-        return (idx, -row.get('LongRuta', 0))
-    results.sort(key=prio)
+            results.append(_validate_item(current_dir_name, dirpath, 'DIR', len(rel), depth, counts))
+        for e in dirs:
+            results.append(_validate_item(e.name, os.path.join(dirpath, e.name), 'DIR',
+                                          rel_len + len(e.name), depth + 1, counts))
+        for e in entries:
+            fn = e.name
+            item = _validate_item(fn, os.path.join(dirpath, fn), 'FILE',
+                                  rel_len + len(fn), depth + 1, counts)
+            results.append(item)
+            if not item['Mask'] & 32:   # oculto/temporal ya evaluado en _validate_item
+                files += 1
+                size += _entry_size_bytes(e)
+    return TreeStats(files, size)
+
+def _validate_subtree(top: os.DirEntry, source_folder):
+    results, counts = [], _new_counts()
+    stats = TreeStats(0, 0)
+    if not _is_link(top):   # no se entra en enlaces (al recorrerlo como raíz sí se haría)
+        stats = _validate_levels(_scandir_walk(top.path), source_folder, counts, results)
+    return results, counts, stats
+
+def scan_tree(source_folder):
+    """
+    Validación y TreeStats del árbol en UN recorrido. -> (results, counts, stats).
+    Con PARALLEL_MIN_SUBTREES o más subcarpetas en la raíz, cada subárbol se valida
+    en un hilo; las partes se concatenan en el orden del recorrido en serie, así el
+    resultado (y el orden tras ordenar) es el mismo.
+    """
+    results, counts = [], _new_counts()
+    source_folder = os.path.abspath(source_folder)
+    walk = _scandir_walk(source_folder)
+    first = next(walk, None)
+    files = size = 0
+    if first is not None:
+        # Salidas previas solo junto a la raíz: más abajo son carpetas del usuario
+        _skip_previous_outputs(first[1])
+        files, size = _validate_levels((first,), source_folder, counts, results)
+        dirs = first[1]
+        if len(dirs) < PARALLEL_MIN_SUBTREES:
+            more = _validate_levels(walk, source_folder, counts, results)
+            files += more.files; size += more.size
+        else:
+            walk.close()
+            with ThreadPoolExecutor(max_workers=min(32, len(dirs))) as ex:
+                for part_rows, part_counts, part_stats in ex.map(_validate_subtree, dirs, [source_folder] * len(dirs)):
+                    results.extend(part_rows)
+                    for k, n in part_counts.items():
+                        counts[k] += n
+                    files += part_stats.files; size += part_stats.size
+    results.sort(key=lambda r: (r['PrioIdx'], -r['LongRuta']))
+    return results, counts, TreeStats(files, size)
+
+def validate_folder(source_folder):
+    results, counts, _ = scan_tree(source_folder)
     return results, counts
 
 # ======= Conversión a PDF =======
+@lru_cache(maxsize=None)
 def which(cmd: str):
-    from shutil import which as _which
-    return _which(cmd)
+    """shutil.which memorizado: el PATH no cambia durante la ejecución."""
+    return shutil.which(cmd)
 
+@lru_cache(maxsize=None)
 def chrome_exe_guess():
     candidates = ["chrome", "google-chrome", "chromium", "chromium-browser", "msedge"]
     for c in candidates:
@@ -289,38 +579,232 @@ def chrome_exe_guess():
         if Path(p).exists(): return p
     return None
 
-def convert_office_to_pdf(src: Path, out_pdf: Path) -> Tuple[bool, bool]:
-    soffice = which("soffice") or which("libreoffice")
-    if soffice:
-        try:
-            cmd = [soffice, "--headless", "--convert-to", "pdf", "--outdir", str(out_pdf.parent), str(src)]
-            ok, to = run_cmd_with_timeout_ex(cmd, TIMEOUT_SOFFICE)
-            if not ok: return False, to
-            produced = out_pdf.parent / (src.stem + ".pdf")
-            if produced.exists():
-                produced.rename(out_pdf); return True, False
-        except Exception:
-            pass
-    if platform.system() == "Windows":
-        try:
+def _soffice_exe() -> Optional[str]:
+    return which("soffice") or which("libreoffice")
+
+def _soffice_cmd(soffice: str, outdir: Path, files, profile_idx: int = 0) -> list:
+    """
+    Comando soffice con perfil propio (UserInstallation): no choca con un LibreOffice
+    abierto por el usuario y el perfil queda "caliente" entre invocaciones.
+    Cada soffice concurrente necesita un perfil distinto (profile_idx).
+    """
+    name = SOFFICE_PROFILE_NAME if profile_idx == 0 else f"{SOFFICE_PROFILE_NAME}_{profile_idx}"
+    profile = Path(tempfile.gettempdir()) / name
+    return [soffice, f"-env:UserInstallation={profile.as_uri()}", "--headless",
+            "--convert-to", "pdf", "--outdir", str(outdir), *(str(f) for f in files)]
+
+# Instancias COM reutilizadas entre archivos (crear Word/Excel/PowerPoint cuesta cientos de ms).
+# Solo se usan desde el hilo de Tk; se cierran al salir. Los originales se abren en solo
+# lectura: sin archivo de bloqueo ~$ en el origen, sin MRU ni actualización de vínculos.
+_COM_APPS: dict = {}
+_COM_LOCK = threading.Lock()
+_COM_SETUP = {
+    'Word.Application':       (("Visible", False), ("DisplayAlerts", 0), ("ScreenUpdating", False)),
+    'Excel.Application':      (("Visible", False), ("DisplayAlerts", False), ("ScreenUpdating", False)),
+    'PowerPoint.Application': (("Visible", False), ("DisplayAlerts", 1)),   # ppAlertsNone
+}
+
+def _com_app(progid: str):
+    with _COM_LOCK:
+        app = _COM_APPS.get(progid)
+        if app is None:
             import win32com.client as win32  # type: ignore
-            ext = src.suffix.lower()
+            app = win32.DispatchEx(progid)
+            for attr, value in _COM_SETUP.get(progid, ()):
+                try: setattr(app, attr, value)
+                except Exception: pass
+            _COM_APPS[progid] = app
+        return app
+
+def _com_drop(progid: str):
+    """Cierra y olvida una instancia (caída o en mal estado): se recrea en el próximo uso."""
+    with _COM_LOCK:
+        app = _COM_APPS.pop(progid, None)
+    if app is not None:
+        try: app.Quit()
+        except Exception: pass
+
+def _com_quit_all():
+    for progid in list(_COM_APPS):
+        _com_drop(progid)
+atexit.register(_com_quit_all)
+
+def _convert_office_com(src: Path, out_pdf: Path) -> Tuple[bool, bool]:
+    if IS_WINDOWS:
+        if not _on_ui_thread():
+            return _ui_call(_convert_office_com, src, out_pdf)
+        ext = src.suffix.lower()
+        progid = None
+        try:
             if ext in {'.doc', '.docx', '.rtf'}:
-                word = win32.DispatchEx('Word.Application'); word.Visible = False
-                doc = word.Documents.Open(str(src))
-                doc.ExportAsFixedFormat(str(out_pdf), 17); doc.Close(False); word.Quit(); return True, False
+                progid = 'Word.Application'
+                doc = _com_app(progid).Documents.Open(str(src), ConfirmConversions=False,
+                                                      ReadOnly=True, AddToRecentFiles=False)
+                try: doc.ExportAsFixedFormat(str(out_pdf), 17)
+                finally: doc.Close(False)
+                return True, False
             if ext in {'.xls', '.xlsx'}:
-                excel = win32.DispatchEx('Excel.Application'); excel.Visible = False
-                wb = excel.Workbooks.Open(str(src))
-                wb.ExportAsFixedFormat(0, str(out_pdf)); wb.Close(False); excel.Quit(); return True, False
+                progid = 'Excel.Application'
+                wb = _com_app(progid).Workbooks.Open(str(src), UpdateLinks=0,
+                                                     ReadOnly=True, AddToMru=False)
+                try: wb.ExportAsFixedFormat(0, str(out_pdf))
+                finally: wb.Close(False)
+                return True, False
             if ext in {'.ppt', '.pptx'}:
-                ppt = win32.DispatchEx('PowerPoint.Application'); ppt.Visible = False
-                pres = ppt.Presentations.Open(str(src), WithWindow=False)
-                pres.SaveAs(str(out_pdf), 32); pres.Close(); ppt.Quit(); return True, False
+                progid = 'PowerPoint.Application'
+                pres = _com_app(progid).Presentations.Open(str(src), ReadOnly=True, WithWindow=False)
+                try: pres.SaveAs(str(out_pdf), 32)
+                finally: pres.Close()
+                return True, False
         except Exception:
-            pass
+            if progid:
+                _com_drop(progid)
+    return False, False
+
+def _convert_soffice_one(soffice: str, src: Path, out_pdf: Path) -> Tuple[bool, bool]:
+    """
+    Un archivo con soffice, con un perfil libre de _SOFFICE_PROFILES y salida en un
+    temporal propio: puede correr a la vez que los lotes y que otras conversiones.
+    """
+    k = _SOFFICE_PROFILES.get()
+    try:
+        with tempfile.TemporaryDirectory(prefix="secop_pdf_") as tmp:
+            cmd = _soffice_cmd(soffice, Path(tmp), [src], profile_idx=k)
+            ok, to = run_cmd_with_timeout_ex(cmd, TIMEOUT_SOFFICE)
+            if not ok: return False, to
+            produced = Path(tmp) / (src.stem + ".pdf")
+            if produced.exists():
+                if os.path.exists(longpath(out_pdf)):
+                    os.remove(longpath(out_pdf))
+                shutil.move(str(produced), longpath(out_pdf))
+                return True, False
+    except Exception:
+        pass
+    finally:
+        _SOFFICE_PROFILES.put(k)
     return False, False
 
+def convert_office_to_pdf(src: Path, out_pdf: Path) -> Tuple[bool, bool]:
+    soffice = _soffice_exe()
+    if soffice:
+        ok, to = _convert_soffice_one(soffice, src, out_pdf)
+        if ok or to: return ok, to
+    return _convert_office_com(src, out_pdf)
+
+# Perfiles de LibreOffice libres: un soffice simultáneo por perfil (compartido entre lotes)
+_SOFFICE_PROFILES: "queue.Queue[int]" = queue.Queue()
+for _k in range(SOFFICE_WORKERS):
+    _SOFFICE_PROFILES.put(_k)
+
+def convert_office_batch_to_pdf(items: list, pump_ui: bool = True, com_fallback: bool = True) -> list:
+    """
+    Convierte varios Office [(src, out_pdf), ...] con UNA invocación de soffice por
+    lote (hasta SOFFICE_BATCH_SIZE archivos, sin stems repetidos). Los lotes corren en
+    paralelo (SOFFICE_WORKERS hilos, cada uno con su propio perfil de LibreOffice);
+    soffice escribe en un temporal y cada PDF se mueve a su destino. Un lote se corta
+    tras TIMEOUT_SOFFICE sin PDF nuevo; solo el archivo colgado queda como timed_out y
+    los que seguían se reintentan en otro lote.
+    -> [(ok, timed_out)] en el mismo orden. Los que soffice no produce (sin timeout)
+    se reintentan por COM en Windows si com_fallback. Fuera del hilo de Tk usar
+    pump_ui=False y com_fallback=False (COM se reintenta luego desde el hilo principal).
+    """
+    soffice = _soffice_exe()
+    if not soffice:
+        return [_convert_office_com(src, out_pdf) if com_fallback else (False, False) for src, out_pdf in items]
+
+    chunks, chunk, stems = [], [], set()
+    for i, (src, _) in enumerate(items):
+        stem = src.stem.lower()
+        if len(chunk) >= SOFFICE_BATCH_SIZE or stem in stems:
+            chunks.append(chunk); chunk, stems = [], set()
+        chunk.append(i); stems.add(stem)
+    if chunk:
+        chunks.append(chunk)
+
+    workers = max(1, min(SOFFICE_WORKERS, len(chunks)))
+
+    def run_soffice(chunk: list, k: int, pump_ui: bool) -> list:
+        """
+        Una invocación de soffice con el perfil k -> [(i, ok, timed_out)]. Se corta si
+        pasa TIMEOUT_SOFFICE sin que aparezca un PDF nuevo en el temporal.
+        """
+        with tempfile.TemporaryDirectory(prefix="secop_pdf_") as tmp:
+            cmd = _soffice_cmd(soffice, Path(tmp), [items[i][0] for i in chunk], profile_idx=k)
+
+            def pdfs_done() -> int:
+                try:
+                    with os.scandir(tmp) as it:
+                        return sum(1 for e in it if e.name.endswith(".pdf"))
+                except OSError:
+                    return 0
+
+            try:
+                _, to = run_cmd_with_timeout_ex(cmd, TIMEOUT_SOFFICE, pump_ui=pump_ui,
+                                                progress=pdfs_done)
+            except Exception:
+                to = False
+            out = []
+            for i in chunk:
+                src, out_pdf = items[i]
+                produced = Path(tmp) / (src.stem + ".pdf")
+                try:
+                    if produced.exists():
+                        if os.path.exists(longpath(out_pdf)):
+                            os.remove(longpath(out_pdf))
+                        shutil.move(str(produced), longpath(out_pdf))
+                        out.append((i, True, False))
+                        continue
+                except Exception:
+                    pass
+                out.append((i, False, to))
+            return out
+
+    def run_chunk(chunk: list, pump_ui: bool) -> list:
+        k = _SOFFICE_PROFILES.get()
+        try:
+            out = []
+            while chunk:
+                res = run_soffice(chunk, k, pump_ui)
+                if not any(to for _, _, to in res):
+                    out.extend(res)
+                    break
+                # soffice convierte en el orden dado: el primero sin PDF tras el último
+                # producido es el que colgó; los anteriores sin PDF fallaron sin colgarse
+                # y los posteriores se reintentan en un lote nuevo
+                last = max((n for n, r in enumerate(res) if r[1]), default=-1)
+                hung = next((n for n in range(last + 1, len(res)) if not res[n][1]), None)
+                if hung is None:   # se cortó ya sin nada pendiente
+                    out.extend((i, ok, False) for i, ok, _ in res)
+                    break
+                out.extend((i, ok, False) for i, ok, _ in res[:hung])
+                out.append((res[hung][0], False, True))
+                chunk = [i for i, _, _ in res[hung + 1:]]
+            return out
+        finally:
+            _SOFFICE_PROFILES.put(k)
+
+    if workers == 1:
+        done = [r for c in chunks for r in run_chunk(c, pump_ui=pump_ui)]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            pending = {ex.submit(run_chunk, c, False) for c in chunks}
+            all_futs = list(pending)
+            while pending:
+                _, pending = wait(pending, timeout=0.05)
+                if pump_ui:
+                    _ui_pump()
+            done = [r for f in all_futs for r in f.result()]
+
+    results = [(False, False)] * len(items)
+    for i, ok, to in done:
+        if ok:
+            results[i] = (True, False)
+        elif to:
+            results[i] = (False, True)
+        elif com_fallback:
+            results[i] = _convert_office_com(*items[i])
+    return results
+
 def convert_image_to_pdf(src: Path, out_pdf: Path) -> Tuple[bool, bool]:
     try:
         import img2pdf  # type: ignore
@@ -361,12 +845,28 @@ def convert_text_to_pdf(src: Path, out_pdf: Path) -> Tuple[bool, bool]:
     except Exception:
         return False, False
 
+def _chrome_cmd(chrome: str, src: Path, out_pdf: Path) -> list:
+    """
+    Comando Chrome/Edge headless con perfil propio reutilizado (--user-data-dir): el
+    perfil queda "caliente" entre archivos y se omiten first-run, extensiones y
+    componentes que alargan el arranque en frío.
+    """
+    profile = Path(tempfile.gettempdir()) / CHROME_PROFILE_NAME
+    return [chrome, "--headless", "--disable-gpu", f"--user-data-dir={profile}",
+            "--no-first-run", "--no-default-browser-check", "--disable-extensions",
+            "--disable-component-update", "--disable-background-networking",
+            f"--print-to-pdf={str(out_pdf)}", str(src.resolve().as_uri())]
+
+# Un solo Chrome a la vez: instancias con el mismo --user-data-dir chocan entre sí
+_CHROME_LOCK = threading.Lock()
+
 def convert_html_to_pdf(src: Path, out_pdf: Path) -> Tuple[bool, bool]:
     chrome = chrome_exe_guess()
     if chrome:
         try:
-            cmd = [chrome, "--headless", "--disable-gpu", f"--print-to-pdf={str(out_pdf)}", str(src.resolve().as_uri())]
-            ok, to = run_cmd_with_timeout_ex(cmd, TIMEOUT_CHROME)
+            cmd = _chrome_cmd(chrome, src, out_pdf)
+            with _CHROME_LOCK:
+                ok, to = run_cmd_with_timeout_ex(cmd, TIMEOUT_CHROME)
             if ok and out_pdf.exists(): return True, False
             if to: return False, True
         except Exception:
@@ -392,27 +892,41 @@ def convert_any_to_pdf(src: Path, out_pdf: Path) -> Tuple[bool, bool]:
     if ext in TXT_EXTS:  return convert_text_to_pdf(src, out_pdf)
     if ext in HTML_EXTS: return convert_html_to_pdf(src, out_pdf)
     if ext in OFFICE_EXTS: return convert_office_to_pdf(src, out_pdf)
-    soffice = which("soffice") or which("libreoffice")
+    soffice = _soffice_exe()
     if soffice:
-        try:
-            cmd = [soffice, "--headless", "--convert-to", "pdf", "--outdir", str(out_pdf.parent), str(src)]
-            ok, to = run_cmd_with_timeout_ex(cmd, TIMEOUT_SOFFICE)
-            if not ok: return False, to
-            produced = out_pdf.parent / (src.stem + ".pdf")
-            if produced.exists():
-                produced.rename(out_pdf); return True, False
-        except Exception:
-            pass
+        return _convert_soffice_one(soffice, src, out_pdf)
     return False, False
 
 # ======= Conteos/tamaños =======
+def _is_real_dir(e: os.DirEntry) -> bool:
+    try:
+        return e.is_dir(follow_symlinks=False)
+    except OSError:
+        return False
+
+def _count_visible(files) -> int:
+    return sum(1 for e in files if not (e.name in HIDDEN_BASENAMES or e.name.startswith('~$')))
+
+def _count_files_tree(top: str) -> int:
+    return sum(_count_visible(files) for _, _, files in _scandir_walk(top))
+
 def count_files(root: Path) -> int:
-    total = 0
-    for dirpath, _, filenames in safe_walk(str(root)):
-        for fn in filenames:
-            if fn in HIDDEN_BASENAMES or fn.startswith('~$'): continue
-            total += 1
-    return total
+    """
+    Archivos visibles bajo root. Con PARALLEL_MIN_SUBTREES o más subcarpetas en la
+    raíz, cada subárbol se cuenta en un hilo (scandir libera el GIL).
+    """
+    walk = _scandir_walk(str(root))
+    first = next(walk, None)
+    if first is None:
+        return 0
+    _, dirs, files = first
+    n = _count_visible(files)
+    if len(dirs) < PARALLEL_MIN_SUBTREES:
+        return n + sum(_count_visible(files) for _, _, files in walk)
+    walk.close()
+    subtrees = [e.path for e in dirs if not _is_link(e)]
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 4) * 2)) as ex:
+        return n + sum(ex.map(_count_files_tree, subtrees))
 
 def _file_size_bytes(p: Path) -> int:
     try:
@@ -423,70 +937,254 @@ def _file_size_bytes(p: Path) -> int:
         except Exception:
             return 0
 
-def dir_size_bytes(root: Path) -> int:
-    total = 0
-    for dirpath, _, filenames in safe_walk(str(root)):
-        for fn in filenames:
-            if fn in HIDDEN_BASENAMES or fn.startswith('~$'):
+def tree_stats(root: Path) -> TreeStats:
+    """Archivos visibles y sus bytes en UN recorrido: cuenta y tamaño salen del mismo DirEntry."""
+    files = size = 0
+    for _, _, entries in _scandir_walk(str(root)):
+        for e in entries:
+            if e.name in HIDDEN_BASENAMES or e.name.startswith('~$'):
                 continue
-            total += _file_size_bytes(Path(dirpath) / fn)
-    return total
+            files += 1
+            size += _entry_size_bytes(e)
+    return TreeStats(files, size)
+
+def dir_size_bytes(root: Path) -> int:
+    return tree_stats(root).size
+
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB", "EB")
 
+@lru_cache(maxsize=1024)   # tamaños repetidos (0, totales de la barra por archivo)
 def human_size(n: int) -> str:
-    units = ["B","KB","MB","GB","TB","PB"]
-    f = float(n)
-    for u in units:
-        if f < 1024.0:
-            return f"{f:.2f} {u}"
-        f /= 1024.0
-    return f"{f:.2f} EB"
+    # Unidad por bit_length (10 bits por unidad) en vez de dividir en bucle; mismo resultado
+    i = 0 if n < 1024 else min(len(_SIZE_UNITS) - 1, (int(n).bit_length() - 1) // 10)
+    return f"{n / (1 << 10 * i):.2f} {_SIZE_UNITS[i]}"
 
 # ======= Eliminar carpetas vacías =======
+def _prune_dir(path: str) -> Tuple[int, bool]:
+    """
+    Poda path de abajo hacia arriba con UN scandir por carpeta: queda vacía si no
+    tiene archivos y todas sus subcarpetas se borraron. -> (borradas, path borrada).
+    """
+    removed, empty = 0, True
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return 0, False
+    for e in entries:
+        if _is_real_dir(e):
+            n, gone = _prune_dir(e.path)
+            removed += n
+            empty = empty and gone
+        else:
+            empty = False
+    if empty:
+        try:
+            os.rmdir(path)
+            return removed + 1, True
+        except OSError:
+            pass
+    return removed, False
+
 def prune_empty_dirs(root: Path, keep_root: bool = True) -> int:
-    removed = 0
-    for dirpath, dirnames, filenames in os.walk(root, topdown=False):
-        p = Path(dirpath)
-        if keep_root and p == root:
+    """Con PARALLEL_MIN_SUBTREES o más subcarpetas en la raíz, cada subárbol se poda en un hilo."""
+    top = longpath(root)
+    if not keep_root:
+        return _prune_dir(top)[0]
+    try:
+        with os.scandir(top) as it:
+            subdirs = [e.path for e in it if _is_real_dir(e)]
+    except OSError:
+        return 0
+    if len(subdirs) < PARALLEL_MIN_SUBTREES:
+        return sum(_prune_dir(p)[0] for p in subdirs)
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 4) * 2)) as ex:
+        return sum(n for n, _ in ex.map(_prune_dir, subdirs))
+
+# ======= Copia/corrección =======
+@lru_cache(maxsize=None)
+def _copyfileex():
+    """(CopyFileExW, tipo de la rutina de progreso) declarados una sola vez, o None."""
+    try:
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        routine_t = ctypes.WINFUNCTYPE(wintypes.DWORD, ctypes.c_longlong, ctypes.c_longlong,
+                                       ctypes.c_longlong, ctypes.c_longlong, wintypes.DWORD,
+                                       wintypes.DWORD, wintypes.HANDLE, wintypes.HANDLE, wintypes.LPVOID)
+        copy_ex = kernel32.CopyFileExW
+        copy_ex.argtypes = [wintypes.LPCWSTR, wintypes.LPCWSTR, routine_t, wintypes.LPVOID,
+                            ctypes.POINTER(wintypes.BOOL), wintypes.DWORD]
+        copy_ex.restype = wintypes.BOOL
+    except Exception:
+        return None
+    return copy_ex, routine_t
+
+def _copy_fast_windows(src: Path, dst: Path, progress: list, cancel: threading.Event) -> Optional[bool]:
+    """
+    CopyFileExW (ruta de copia del SO); la rutina de progreso actualiza progress[0] y
+    cancela si se pide (el SO borra el destino parcial). -> ok, o None si no aplica/falla.
+    """
+    api = _copyfileex()
+    if api is None:
+        return None
+    copy_ex, routine_t = api
+
+    def routine(total, done, *_):
+        progress[0] = done
+        return 1 if cancel.is_set() else 0   # PROGRESS_CANCEL / PROGRESS_CONTINUE
+
+    cb = routine_t(routine)
+    if copy_ex(longpath(src), longpath(dst), cb, None, None, 0):
+        return True
+    return False if cancel.is_set() else None
+
+def _copy_fast_sendfile(src: Path, dst: Path, progress: list, cancel: threading.Event) -> Optional[bool]:
+    """os.sendfile por bloques (copia en el kernel). -> ok, o None si no aplica."""
+    if not hasattr(os, "sendfile"):
+        return None
+    try:
+        with open(longpath(src), 'rb', buffering=0) as fsrc, open(longpath(dst), 'wb', buffering=0) as fdst:
+            in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+            while not cancel.is_set():
+                try:
+                    n = os.sendfile(out_fd, in_fd, progress[0], CHUNK_SIZE)
+                except OSError:
+                    if progress[0] == 0:
+                        return None   # FS sin soporte: se usa el bucle en Python
+                    raise
+                if not n:
+                    if hasattr(os, "posix_fadvise"):   # origen leído una vez: que no desplace la caché
+                        try: os.posix_fadvise(in_fd, 0, 0, os.POSIX_FADV_DONTNEED)
+                        except OSError: pass
+                    return True
+                progress[0] += n
+    except Exception:
+        pass
+    return False
+
+_copy_buffers = threading.local()
+
+def _thread_copy_buffer() -> memoryview:
+    """Buffer de copia de CHUNK_SIZE por hilo: se reserva una vez y se reutiliza entre archivos."""
+    view = getattr(_copy_buffers, "view", None)
+    if view is None:
+        view = _copy_buffers.view = memoryview(bytearray(CHUNK_SIZE))
+    return view
+
+def _copy_readinto(src: Path, dst: Path, progress: list, cancel: threading.Event) -> bool:
+    """Bucle en Python con el buffer del hilo (readinto): sin reservar memoria por archivo."""
+    view = _thread_copy_buffer()
+    try:
+        with open(longpath(src), 'rb', buffering=0) as fsrc, open(longpath(dst), 'wb', buffering=0) as fdst:
+            while not cancel.is_set():
+                n = fsrc.readinto(view)
+                if not n:
+                    return True
+                w = 0
+                while w < n:
+                    w += fdst.write(view[w:n])
+                progress[0] += n
+    except Exception:
+        pass
+    return False
+
+def _copy_bytes(src: Path, dst: Path, progress: list, cancel: threading.Event) -> bool:
+    """Copia del SO (CopyFileExW en Windows, sendfile en POSIX) o, si no hay, readinto."""
+    if IS_WINDOWS:
+        ok = _copy_fast_windows(src, dst, progress, cancel)
+    else:
+        ok = _copy_fast_sendfile(src, dst, progress, cancel)
+    if ok is None:
+        progress[0] = 0
+        ok = _copy_readinto(src, dst, progress, cancel)
+    return ok
+
+def _prefetch_inode_order(entries: list):
+    """
+    Linux: pide al kernel leer por adelantado (POSIX_FADV_WILLNEED) los archivos de una
+    carpeta (DirEntry del recorrido) en orden de inodo, que en discos mecánicos aproxima
+    el orden físico. Solo lo que la copia va a leer (sin ocultos/temporales), archivos de
+    hasta PREFETCH_MAX_FILE y PREFETCH_MAX_DIR bytes por carpeta: más que eso compite con
+    la copia y el kernel lo desaloja antes de usarlo.
+    No cambia el orden de procesamiento (ni, por tanto, los nombres asignados).
+    """
+    todo = []
+    for e in entries:
+        if e.name in HIDDEN_BASENAMES or e.name.startswith('~$'):
+            continue
+        size = _entry_size_bytes(e)
+        if 0 < size <= PREFETCH_MAX_FILE:
+            todo.append((e.inode(), e.path, size))
+    todo.sort()
+    budget = PREFETCH_MAX_DIR
+    for _, path, size in todo:
+        if size > budget:
             continue
         try:
-            if not any(p.iterdir()):
-                p.rmdir()
-                removed += 1
-        except Exception:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            budget -= size
+        except OSError:
             pass
-    return removed
+        finally:
+            os.close(fd)
+
+def _copy_small(src: Path, dst: Path) -> bool:
+    """Copia sin UI ni progreso: archivos de hasta CHUNK_SIZE, desde la cola de copias."""
+    if not _copy_bytes(src, dst, [0], threading.Event()):
+        return False
+    try:
+        shutil.copystat(longpath(src), longpath(dst), follow_symlinks=True)
+    except Exception:
+        pass
+    return True
 
-# ======= Copia/corrección =======
 def copy_file_chunked(src: Path, dst: Path, timeout_sec: int | None,
                       inner_cb: Optional[Callable[[int, int], None]] = None) -> tuple[bool, bool]:
-    """Copia en bloques con UI y callback de progreso por archivo. -> (ok, timed_out)."""
+    """
+    Copia con callback de progreso por archivo. -> (ok, timed_out).
+    La copia corre en un hilo (la E/S libera el GIL); el hilo llamador solo refresca el
+    progreso (y la UI, si es el de Tk) cada UI_REFRESH_SEC y cancela por timeout. Los archivos de hasta
+    CHUNK_SIZE se copian directamente.
+    """
     total = _file_size_bytes(src)
-    copied = 0
-    start = time.time()
+    progress = [0]
+    cancel = threading.Event()
+    if total <= CHUNK_SIZE:
+        ok = _copy_bytes(src, dst, progress, cancel)
+    else:
+        result = []
+        worker = threading.Thread(target=lambda: result.append(_copy_bytes(src, dst, progress, cancel)),
+                                  daemon=True)
+        worker.start()
+        start = time.time()
+        while True:
+            worker.join(UI_REFRESH_SEC)
+            if not worker.is_alive():
+                break
+            if inner_cb:
+                try: inner_cb(progress[0], total)
+                except Exception: pass
+            _ui_pump()
+            if timeout_sec is not None and (time.time() - start) > timeout_sec:
+                cancel.set()
+                worker.join()
+                return False, True
+        ok = bool(result and result[0])
+    if not ok:
+        return False, False
     try:
-        with open(longpath(src), 'rb') as fsrc, open(longpath(dst), 'wb') as fdst:
-            while True:
-                buf = fsrc.read(CHUNK_SIZE)
-                if not buf:
-                    break
-                fdst.write(buf)
-                copied += len(buf)
-                if inner_cb:
-                    try: inner_cb(copied, total)
-                    except Exception: pass
-                _ui_pump()
-                if timeout_sec is not None and (time.time() - start) > timeout_sec:
-                    return False, True
-        try:
-            shutil.copystat(longpath(src), longpath(dst), follow_symlinks=True)
-        except Exception:
-            pass
-        if inner_cb:
-            try: inner_cb(total, total)
-            except Exception: pass
-        return True, False
+        shutil.copystat(longpath(src), longpath(dst), follow_symlinks=True)
     except Exception:
-        return False, False
+        pass
+    if inner_cb:
+        try: inner_cb(total, total)
+        except Exception: pass
+    return True, False
 
 def copy_with_prompt_on_timeout(src: Path, dst: Path, relq: str,
                                 inner_cb: Optional[Callable[[int,int], None]] = None) -> str:
@@ -494,8 +1192,8 @@ def copy_with_prompt_on_timeout(src: Path, dst: Path, relq: str,
     if ok:
         return "COPIADO"
     if to:
-        ans = messagebox.askyesno(
-            PROJECT_NAME,
+        ans = _ui_call(
+            messagebox.askyesno, PROJECT_NAME,
             f"La copia de este archivo está tardando demasiado:\n\n{relq}\n\n"
             f"¿Quieres CONTINUAR la copia sin límite (ventana fluida) a la carpeta CORREGIDA?\n\n"
             f"Sí = seguir copiando\nNo = omitir"
@@ -507,187 +1205,353 @@ def copy_with_prompt_on_timeout(src: Path, dst: Path, relq: str,
             return "OMITIDO_STUCK"
     return "ERROR"
 
+# Fila del mapeo original -> corregido (tupla: una por archivo y carpeta, pesa menos que un dict)
+MapRow = namedtuple('MapRow', 'tipo original corregido estado')
+
 def copy_with_rules_and_convert(src_root: Path, out_parent: Path, progress_cb=None, total_files: Optional[int] = None,
                                 file_progress_cb: Optional[Callable[[int,int,str], None]] = None):
     mapping = []
 
+    # Carpetas ya creadas (o existentes): mkdir -p una sola vez por carpeta destino
+    made_dirs: set[str] = set()
+    def ensure_dir(d: Path):
+        if str(d) in made_dirs:
+            return
+        d.mkdir(parents=True, exist_ok=True)
+        while d.name and str(d) not in made_dirs:
+            made_dirs.add(str(d))
+            d = d.parent
+
     sane_root = sanitize_component_letters_digits(src_root.name)
     root_candidate = f"{sane_root}corregido{SUFFIX_C}"
+    _used_names.clear()
     root_name_out = ensure_unique_preserving_C(out_parent, root_candidate)
     base_dest = out_parent / root_name_out
-    base_dest.mkdir(parents=True, exist_ok=True)
+    ensure_dir(base_dest)
+    _mark_used(base_dest)
 
     dump_dir = out_parent / NON_PDF_DUMP_NAME
-    dump_dir.mkdir(parents=True, exist_ok=True)
+    ensure_dir(dump_dir)
+    _mark_used(dump_dir)
 
-    dir_map: dict[Path, Path] = {src_root: base_dest}
+    # Claves = ruta origen como str (la del recorrido): sin hash de Path por consulta
+    dir_map: dict[str, Path] = {str(src_root): base_dest}
+    # Carpeta de archivos (ya con MaxDepth) de cada destino: una subida por carpeta, no por archivo
+    file_dir_map: dict[str, Path] = {str(src_root): base_dest}
     merge_map: dict[tuple[str, str], Path] = {}
 
+    # Ruta relativa al origen por corte de cadena (relative_to es lento por archivo)
+    root_prefix = os.path.join(str(src_root), '')
+    def rel_of(p: Path) -> str:
+        s = str(p)
+        return s[len(root_prefix):] if s.startswith(root_prefix) else p.name
+
     processed = 0
     total = total_files if total_files is not None else count_files(src_root)
-
-    for dirpath, _, filenames in safe_walk(str(src_root)):
-        cur = Path(dirpath)
-
-        if cur != src_root:
-            src_parent = cur.parent
-            dest_parent = dir_map[src_parent]
-            dest_parent = bubble_file_for_maxdepth(dest_parent, base_dest)
-
-            clean = sanitize_component_letters_digits(cur.name)
-            key10 = (clean[:KEEP_SHORT_DIR] or "a")
-            name10C = limit_filename(key10 + SUFFIX_C, MAX_FILE_NAME_DEFAULT)
-
-            candidate = ensure_unique_preserving_C(dest_parent, name10C)
-            dest_parent_final, candidate_final = fit_dirname_in_maxpath_bubbling(dest_parent, base_dest, candidate)
-            dest_dir = dest_parent_final / candidate_final
-
-            merge_key = (str(dest_parent_final), key10)
-            if merge_key in merge_map:
-                dest_dir = merge_map[merge_key]
+    batch_office = _soffice_exe() is not None
+    # soffice corre en segundo plano mientras el hilo principal sigue copiando;
+    # cada lote reserva sus filas en mapping y se recoge al final, en orden.
+    office_exec = ThreadPoolExecutor(max_workers=SOFFICE_WORKERS) if batch_office else None
+    office_jobs = []   # [(future, slots, office_batch)]
+    # PDFs pequeños (<= CHUNK_SIZE): copias simultáneas con profundidad acotada;
+    # cada una reserva su fila en mapping y se recoge en orden.
+    copy_exec = ThreadPoolExecutor(max_workers=COPY_WORKERS)
+    copy_jobs = deque()   # (future, slot, src_file, target_path)
+    copy_inflight = set()
+    # Resto de no-PDF (imágenes, texto, HTML, otros vía soffice): también en segundo plano,
+    # con fila reservada; se recogen al final junto con los lotes Office.
+    conv_exec = ThreadPoolExecutor(max_workers=CONVERT_WORKERS)
+    conv_jobs = []        # (future, slot, item)
+    conv_inflight = {}    # destino -> future
+
+    def reap_copy():
+        fut, slot, src_f, dst_f = copy_jobs.popleft()
+        copy_inflight.discard(str(dst_f))
+        try:
+            ok = fut.result()
+        except Exception:
+            ok = False
+        if ok:
+            mapping[slot] = MapRow("FILE", str(src_f), str(dst_f), "COPIADO")
+        else:
+            mapping[slot] = MapRow("FILE", str(src_f), "--ERROR_COPIA", "ERROR")
+
+    def wait_target(p: Path):
+        """Si hay una copia o conversión en vuelo hacia p, se espera: el destino se escribe en orden."""
+        while str(p) in copy_inflight:
+            reap_copy()
+        fut = conv_inflight.get(str(p))
+        if fut is not None:
+            wait([fut])
+
+    def finish_conversion(src_file, cur_dest, base_clean, ext_lower, depth_ok_dir,
+                          pdf_target, inner_cb, converted, timed_out) -> MapRow:
+        """Fila de mapping para un no-PDF ya intentado: convertido, 'stuck' (pregunta) o extraído."""
+        if converted:
+            return MapRow("FILE", str(src_file), str(pdf_target), "CONVERTIDO")
+        else:
+            if timed_out:
+                relq = rel_of(src_file).replace('\\', '/')
+                ans = _ui_call(
+                    messagebox.askyesno, PROJECT_NAME,
+                    f"El archivo tardó demasiado o el conversor se quedó pegado:\n\n{relq}\n\n"
+                    f"¿Quieres COPIAR el archivo original (sin convertir) a la carpeta CORREGIDA?\n\n"
+                    f"Sí = copiar a corregida (con nombre saneado y sufijo 'C')\n"
+                    f"No = omitir este archivo"
+                )
+                if ans:
+                    out_name_any = limit_filename(base_clean + SUFFIX_C + ext_lower, MAX_FILE_NAME_DEFAULT)
+                    out_name_any = ensure_unique_preserving_C(cur_dest, out_name_any)
+                    any_dir_final, out_name_any_final = fit_in_maxpath_bubbling(
+                        target_dir=depth_ok_dir, floor_dir=base_dest, name=out_name_any, keep_C_suffix=True
+                    )
+                    any_target = any_dir_final / out_name_any_final
+                    ensure_dir(any_target.parent)
+                    _mark_used(any_target)
+                    try:
+                        estado = copy_with_prompt_on_timeout(src_file, any_target, relq, inner_cb=inner_cb)
+                        if estado.startswith("COPIADO"):
+                            return MapRow("FILE", str(src_file), str(any_target), "COPIADO_STUCK_A_CORREGIDA")
+                        elif estado == "OMITIDO_STUCK":
+                            return MapRow("FILE", str(src_file), "--OMITIDO (copia lenta)", "OMITIDO_STUCK")
+                        else:
+                            return MapRow("FILE", str(src_file), "--ERROR_STUCK_COPY", "ERROR")
+                    except Exception as e:
+                        return MapRow("FILE", str(src_file), f"--ERROR_STUCK_COPY: {e}", "ERROR")
+                else:
+                    return MapRow("FILE", str(src_file), "--OMITIDO (stuck)", "OMITIDO_STUCK")
             else:
-                dest_dir = bubble_dir_for_maxdepth(dest_dir, base_dest)
-                dest_dir.mkdir(parents=True, exist_ok=True)
-                merge_map[merge_key] = dest_dir
+                rel_parts = rel_of(src_file).split(os.sep)
+                rel_sanit = [sanitize_component_letters_digits(p) for p in rel_parts[:-1]]
+                dump_subdir = dump_dir.joinpath(*rel_sanit) if rel_sanit else dump_dir
+                ensure_dir(dump_subdir)
+                _mark_used(dump_subdir)
+
+                dump_subdir = bubble_file_for_maxdepth(dump_subdir, dump_dir)
+                dump_name = limit_filename(sanitize_component_letters_digits(src_file.stem) + ext_lower, MAX_FILE_NAME_DEFAULT)
+                dump_name = ensure_unique_generic(dump_subdir, dump_name)
+
+                dump_dir_final, dump_name_final = fit_in_maxpath_bubbling(
+                    target_dir=dump_subdir, floor_dir=dump_dir, name=dump_name, keep_C_suffix=False
+                )
+                dump_target = dump_dir_final / dump_name_final
+                ensure_dir(dump_target.parent)
+                _mark_used(dump_target)
+                try:
+                    relq = rel_of(src_file).replace('\\', '/')
+                    estado = copy_with_prompt_on_timeout(src_file, dump_target, relq, inner_cb=inner_cb)
+                    if estado.startswith("COPIADO"):
+                        return MapRow("FILE", str(src_file), str(dump_target), "EXTRAIDO_NO_PDF")
+                    elif estado == "OMITIDO_STUCK":
+                        return MapRow("FILE", str(src_file), "--OMITIDO (dump lento)", "OMITIDO_STUCK")
+                    else:
+                        return MapRow("FILE", str(src_file), "--ERROR_DUMP", "ERROR")
+                except Exception as e:
+                    return MapRow("FILE", str(src_file), f"--ERROR_DUMP: {e}", "ERROR")
 
-            dir_map[cur] = dest_dir
-        else:
-            dest_dir = base_dest
+    prefetch_exec = ThreadPoolExecutor(max_workers=1) if PREFETCH_INODE_ORDER else None
+    prefetch_fut = None
 
-        mapping.append({"Tipo":"DIR","Original":str(cur), "Corregido":str(dir_map[cur]), "Estado":"OK"})
+    # Reservas de PDF (0 bytes) de lotes Office aún sin resultado
+    reserved: set = set()
+    try:
+        root_level = True
+        for d, dirs, entries in _scandir_walk(str(src_root)):
+            if root_level:   # mismo criterio que scan_tree (solo la raíz): cuadra el conteo
+                _skip_previous_outputs(dirs)
+                root_level = False
+            cur = Path(shortpath(d))
+            key = str(cur)
+            # Una carpeta en vuelo como máximo: si la anterior sigue, esta va sin adelanto
+            if prefetch_exec and entries and (prefetch_fut is None or prefetch_fut.done()):
+                prefetch_fut = prefetch_exec.submit(_prefetch_inode_order, entries)
+
+            if key not in dir_map:   # solo la raíz está de antemano
+                dest_parent = file_dir_map[os.path.dirname(key)]
+
+                clean = sanitize_component_letters_digits(cur.name)
+                key10 = (clean[:KEEP_SHORT_DIR] or "a")
+                name10C = limit_filename(key10 + SUFFIX_C, MAX_FILE_NAME_DEFAULT)
+
+                candidate = ensure_unique_preserving_C(dest_parent, name10C)
+                dest_parent_final, candidate_final = fit_dirname_in_maxpath_bubbling(dest_parent, base_dest, candidate)
+                dest_dir = dest_parent_final / candidate_final
+
+                merge_key = (str(dest_parent_final), key10)
+                if merge_key in merge_map:
+                    dest_dir = merge_map[merge_key]
+                else:
+                    dest_dir = bubble_dir_for_maxdepth(dest_dir, base_dest)
+                    ensure_dir(dest_dir)
+                    _mark_used(dest_dir)
+                    merge_map[merge_key] = dest_dir
+
+                dir_map[key] = dest_dir
+                file_dir_map[key] = bubble_file_for_maxdepth(dest_dir, base_dest)
+            cur_dest = dir_map[key]
+            depth_ok_dir = file_dir_map[key]
+
+            mapping.append(MapRow("DIR", key, str(cur_dest), "OK"))
+
+            office_batch = []
+            for entry in entries:
+                fn = entry.name
+                if fn in HIDDEN_BASENAMES or fn.startswith('~$'):
+                    mapping.append(MapRow("FILE", str(cur / fn), "--OMITIDO (oculto/temp)", "OMITIDO"))
+                    continue
+
+                src_file = cur / fn
+                base, ext = os.path.splitext(fn)
+                base_clean = sanitize_component_letters_digits(base)
+                ext_lower  = ext.lower()
+
+                # Progreso global
+                processed += 1
+                if progress_cb:
+                    rel_disp = rel_of(src_file).replace('\\', '/')
+                    try: progress_cb(processed, total, rel_disp)
+                    except Exception: pass
 
-        for fn in filenames:
-            if fn in HIDDEN_BASENAMES or fn.startswith('~$'):
-                mapping.append({"Tipo":"FILE","Original":str(cur / fn), "Corregido":"--OMITIDO (oculto/temp)", "Estado":"OMITIDO"})
-                continue
+                # Callback para barra por archivo (nombre fijado ahora: puede usarse en diferido)
+                def inner_cb(done: int, tot: int, _name: str = src_file.name):
+                    if file_progress_cb:
+                        file_progress_cb(done, tot, _name)
 
-            src_file = cur / fn
-            base, ext = os.path.splitext(fn)
-            base_clean = sanitize_component_letters_digits(base)
-            ext_lower  = ext.lower()
+                if ext_lower == ".pdf":
+                    out_name = limit_filename(base_clean + SUFFIX_C + ext_lower, MAX_FILE_NAME_DEFAULT)
+                    out_name = ensure_unique_preserving_C(cur_dest, out_name)
 
-            # Progreso global
-            processed += 1
-            if progress_cb:
-                try:
-                    rel_disp = str(src_file.relative_to(src_root)).replace('\\', '/')
-                except Exception:
-                    rel_disp = src_file.name
-                try: progress_cb(processed, total, rel_disp)
-                except Exception: pass
-
-            # Callback para barra por archivo
-            def inner_cb(done: int, tot: int):
-                if file_progress_cb:
-                    file_progress_cb(done, tot, src_file.name)
+                    dest_dir_final, out_name_final = fit_in_maxpath_bubbling(
+                        target_dir=depth_ok_dir, floor_dir=base_dest, name=out_name, keep_C_suffix=True
+                    )
+                    target_path = dest_dir_final / out_name_final
+                    ensure_dir(target_path.parent)
+                    _mark_used(target_path)
+
+                    wait_target(target_path)
+                    if _entry_size_bytes(entry) <= CHUNK_SIZE:   # tamaño del listado, sin otro stat
+                        if len(copy_jobs) >= COPY_QUEUE_DEPTH:
+                            reap_copy()
+                        copy_jobs.append((copy_exec.submit(_copy_small, src_file, target_path),
+                                          len(mapping), src_file, target_path))
+                        copy_inflight.add(str(target_path))
+                        mapping.append(None)
+                        continue
 
-            if ext_lower == ".pdf":
-                out_name = limit_filename(base_clean + SUFFIX_C + ext_lower, MAX_FILE_NAME_DEFAULT)
-                out_name = ensure_unique_preserving_C(dir_map[cur], out_name)
+                    try:
+                        relq = rel_of(src_file).replace('\\', '/')
+                        estado = copy_with_prompt_on_timeout(src_file, target_path, relq, inner_cb=inner_cb)
+                        if estado.startswith("COPIADO"):
+                            mapping.append(MapRow("FILE", str(src_file), str(target_path), estado))
+                        elif estado == "OMITIDO_STUCK":
+                            mapping.append(MapRow("FILE", str(src_file), "--OMITIDO (copia lenta)", "OMITIDO_STUCK"))
+                        else:
+                            mapping.append(MapRow("FILE", str(src_file), "--ERROR_COPIA", "ERROR"))
+                    except Exception as e:
+                        mapping.append(MapRow("FILE", str(src_file), f"--ERROR_COPIA: {e}", "ERROR"))
 
-                depth_ok_dir = bubble_file_for_maxdepth(dir_map[cur], base_dest)
-                dest_dir_final, out_name_final = fit_in_maxpath_bubbling(
-                    target_dir=depth_ok_dir, floor_dir=base_dest, name=out_name, keep_C_suffix=True
-                )
-                target_path = dest_dir_final / out_name_final
-                target_path.parent.mkdir(parents=True, exist_ok=True)
+                else:
+                    out_name_pdf = limit_filename(base_clean + SUFFIX_C + ".pdf", MAX_FILE_NAME_DEFAULT)
+                    out_name_pdf = ensure_unique_preserving_C(cur_dest, out_name_pdf)
 
-                try:
+                    pdf_dir_final, out_name_pdf_final = fit_in_maxpath_bubbling(
+                        target_dir=depth_ok_dir, floor_dir=base_dest, name=out_name_pdf, keep_C_suffix=True
+                    )
+                    pdf_target = pdf_dir_final / out_name_pdf_final
+                    ensure_dir(pdf_target.parent)
+                    _mark_used(pdf_target)
+                    wait_target(pdf_target)
+
+                    item = (src_file, cur_dest, base_clean, ext_lower, depth_ok_dir, pdf_target, inner_cb)
+                    if batch_office and ext_lower in OFFICE_EXTS:
+                        # Se reserva el nombre para que los siguientes archivos no lo tomen
+                        try:
+                            open(longpath(pdf_target), 'wb').close()
+                            reserved.add(pdf_target)
+                        except Exception: pass
+                        office_batch.append(item)
+                        continue
+
+                    if ext_lower not in OFFICE_EXTS:   # Office sin soffice va por COM, en este hilo
+                        fut = conv_exec.submit(convert_any_to_pdf, src_file, pdf_target)
+                        conv_jobs.append((fut, len(mapping), item))
+                        conv_inflight[str(pdf_target)] = fut
+                        mapping.append(None)
+                        continue
+
+                    converted, timed_out = False, False
                     try:
-                        relq = str(src_file.relative_to(src_root)).replace('\\', '/')
+                        converted, timed_out = convert_any_to_pdf(src_file, pdf_target)
                     except Exception:
-                        relq = src_file.name
-                    estado = copy_with_prompt_on_timeout(src_file, target_path, relq, inner_cb=inner_cb)
-                    if estado.startswith("COPIADO"):
-                        mapping.append({"Tipo":"FILE","Original":str(src_file), "Corregido":str(target_path), "Estado":estado})
-                    elif estado == "OMITIDO_STUCK":
-                        mapping.append({"Tipo":"FILE","Original":str(src_file), "Corregido":"--OMITIDO (copia lenta)", "Estado":"OMITIDO_STUCK"})
-                    else:
-                        mapping.append({"Tipo":"FILE","Original":str(src_file), "Corregido":"--ERROR_COPIA", "Estado":"ERROR"})
-                except Exception as e:
-                    mapping.append({"Tipo":"FILE","Original":str(src_file), "Corregido":f"--ERROR_COPIA: {e}", "Estado":"ERROR"})
+                        converted, timed_out = (False, False)
+                    if not converted and not os.path.exists(longpath(pdf_target)):
+                        _mark_free(pdf_target)
 
-            else:
-                out_name_pdf = limit_filename(base_clean + SUFFIX_C + ".pdf", MAX_FILE_NAME_DEFAULT)
-                out_name_pdf = ensure_unique_preserving_C(dir_map[cur], out_name_pdf)
+                    mapping.append(finish_conversion(*item, converted, timed_out))
 
-                depth_ok_dir = bubble_file_for_maxdepth(dir_map[cur], base_dest)
-                pdf_dir_final, out_name_pdf_final = fit_in_maxpath_bubbling(
-                    target_dir=depth_ok_dir, floor_dir=base_dest, name=out_name_pdf, keep_C_suffix=True
-                )
-                pdf_target = pdf_dir_final / out_name_pdf_final
-                pdf_target.parent.mkdir(parents=True, exist_ok=True)
+            # Office del directorio: lotes de soffice en segundo plano, filas reservadas
+            if office_batch:
+                slots = list(range(len(mapping), len(mapping) + len(office_batch)))
+                mapping.extend([None] * len(office_batch))
+                fut = office_exec.submit(convert_office_batch_to_pdf,
+                                         [(it[0], it[5]) for it in office_batch], False, False)
+                office_jobs.append((fut, slots, office_batch))
 
-                converted, timed_out = False, False
+        while copy_jobs:
+            reap_copy()
+
+        if conv_jobs:
+            if progress_cb:
+                try: progress_cb(processed, total, "Convirtiendo documentos…")
+                except Exception: pass
+            pending = {fut for fut, _, _ in conv_jobs}
+            while pending:
+                _, pending = wait(pending, timeout=0.05)
+                _ui_pump()
+            for fut, slot, item in conv_jobs:
                 try:
-                    converted, timed_out = convert_any_to_pdf(src_file, pdf_target)
+                    converted, timed_out = fut.result()
                 except Exception:
                     converted, timed_out = (False, False)
+                if not converted and not os.path.exists(longpath(item[5])):
+                    _mark_free(item[5])
+                mapping[slot] = finish_conversion(*item, converted, timed_out)
 
-                if converted:
-                    mapping.append({"Tipo":"FILE","Original":str(src_file), "Corregido":str(pdf_target), "Estado":"CONVERTIDO"})
-                else:
-                    if timed_out:
-                        try:
-                            relq = str(src_file.relative_to(src_root)).replace('\\', '/')
-                        except Exception:
-                            relq = src_file.name
-                        ans = messagebox.askyesno(
-                            PROJECT_NAME,
-                            f"El archivo tardó demasiado o el conversor se quedó pegado:\n\n{relq}\n\n"
-                            f"¿Quieres COPIAR el archivo original (sin convertir) a la carpeta CORREGIDA?\n\n"
-                            f"Sí = copiar a corregida (con nombre saneado y sufijo 'C')\n"
-                            f"No = omitir este archivo"
-                        )
-                        if ans:
-                            out_name_any = limit_filename(base_clean + SUFFIX_C + ext_lower, MAX_FILE_NAME_DEFAULT)
-                            out_name_any = ensure_unique_preserving_C(dir_map[cur], out_name_any)
-                            any_dir_final, out_name_any_final = fit_in_maxpath_bubbling(
-                                target_dir=depth_ok_dir, floor_dir=base_dest, name=out_name_any, keep_C_suffix=True
-                            )
-                            any_target = any_dir_final / out_name_any_final
-                            any_target.parent.mkdir(parents=True, exist_ok=True)
-                            try:
-                                estado = copy_with_prompt_on_timeout(src_file, any_target, relq, inner_cb=inner_cb)
-                                if estado.startswith("COPIADO"):
-                                    mapping.append({"Tipo":"FILE","Original":str(src_file), "Corregido":str(any_target), "Estado":"COPIADO_STUCK_A_CORREGIDA"})
-                                elif estado == "OMITIDO_STUCK":
-                                    mapping.append({"Tipo":"FILE","Original":str(src_file), "Corregido":"--OMITIDO (copia lenta)", "Estado":"OMITIDO_STUCK"})
-                                else:
-                                    mapping.append({"Tipo":"FILE","Original":str(src_file), "Corregido":"--ERROR_STUCK_COPY", "Estado":"ERROR"})
-                            except Exception as e:
-                                mapping.append({"Tipo":"FILE","Original":str(src_file), "Corregido":f"--ERROR_STUCK_COPY: {e}", "Estado":"ERROR"})
-                        else:
-                            mapping.append({"Tipo":"FILE","Original":str(src_file), "Corregido":"--OMITIDO (stuck)", "Estado":"OMITIDO_STUCK"})
-                    else:
-                        rel_parts = list(src_file.relative_to(src_root).parts)
-                        rel_sanit = [sanitize_component_letters_digits(p) for p in rel_parts[:-1]]
-                        dump_subdir = dump_dir.joinpath(*rel_sanit) if rel_sanit else dump_dir
-                        dump_subdir.mkdir(parents=True, exist_ok=True)
-
-                        dump_subdir = bubble_file_for_maxdepth(dump_subdir, dump_dir)
-                        dump_name = limit_filename(sanitize_component_letters_digits(src_file.stem) + ext_lower, MAX_FILE_NAME_DEFAULT)
-                        dump_name = ensure_unique_generic(dump_subdir, dump_name)
-
-                        dump_dir_final, dump_name_final = fit_in_maxpath_bubbling(
-                            target_dir=dump_subdir, floor_dir=dump_dir, name=dump_name, keep_C_suffix=False
-                        )
-                        dump_target = dump_dir_final / dump_name_final
-                        dump_target.parent.mkdir(parents=True, exist_ok=True)
+        if office_jobs:
+            if progress_cb:
+                try: progress_cb(processed, total, "Convirtiendo documentos Office…")
+                except Exception: pass
+            pending = {fut for fut, _, _ in office_jobs}
+            while pending:
+                _, pending = wait(pending, timeout=0.05)
+                _ui_pump()
+            for fut, slots, office_batch in office_jobs:
+                try:
+                    batch_results = fut.result()
+                except Exception:
+                    batch_results = [(False, False)] * len(office_batch)
+                for slot, item, (converted, timed_out) in zip(slots, office_batch, batch_results):
+                    reserved.discard(item[5])
+                    if not converted and not timed_out:
+                        converted, timed_out = _convert_office_com(item[0], item[5])
+                    if not converted:
                         try:
-                            try:
-                                relq = str(src_file.relative_to(src_root)).replace('\\', '/')
-                            except Exception:
-                                relq = src_file.name
-                            estado = copy_with_prompt_on_timeout(src_file, dump_target, relq, inner_cb=inner_cb)
-                            if estado.startswith("COPIADO"):
-                                mapping.append({"Tipo":"FILE","Original":str(src_file), "Corregido":str(dump_target), "Estado":"EXTRAIDO_NO_PDF"})
-                            elif estado == "OMITIDO_STUCK":
-                                mapping.append({"Tipo":"FILE","Original":str(src_file), "Corregido":"--OMITIDO (dump lento)", "Estado":"OMITIDO_STUCK"})
-                            else:
-                                mapping.append({"Tipo":"FILE","Original":str(src_file), "Corregido":"--ERROR_DUMP", "Estado":"ERROR"})
-                        except Exception as e:
-                            mapping.append({"Tipo":"FILE","Original":str(src_file), "Corregido":f"--ERROR_DUMP: {e}", "Estado":"ERROR"})
+                            os.remove(longpath(item[5]))   # nombre reservado sin PDF
+                            _mark_free(item[5])
+                        except Exception: pass
+                    mapping[slot] = finish_conversion(*item, converted, timed_out)
+    finally:
+        # También ante error o cancelación: ningún hilo sigue escribiendo en el destino
+        for ex in (copy_exec, conv_exec, office_exec, prefetch_exec):
+            if ex:
+                ex.shutdown(wait=True, cancel_futures=True)
+        for p in reserved:   # conversión que no llegó a terminar
+            try:
+                if os.path.getsize(longpath(p)) == 0:
+                    os.remove(longpath(p))
+                    _mark_free(p)
+            except OSError:
+                pass
 
     if progress_cb:
         try: progress_cb(total, total, "Completado")
@@ -696,54 +1560,90 @@ def copy_with_rules_and_convert(src_root: Path, out_parent: Path, progress_cb=No
     return mapping, base_dest, dump_dir
 
 # ======= Reportes =======
+# Partes fijas de los reportes: solo dependen de constantes, se arman una vez al importar
+_REPORT_STYLE = """<style>
+body { font-family: Arial, sans-serif; margin: 24px; }
+table { border-collapse: collapse; width: 100%; margin-top: 12px; }
+th, td { border: 1px solid #ddd; padding: 6px; font-size: 14px; }
+th { background: #f5f5f5; }
+.badge { display:inline-block; padding:4px 10px; border-radius:10px; font-weight:600; }
+.badge-ok { background:#c8f7c5; }
+.badge-bad { background:#ffd6d6; }
+code { background:#f1f1f1; padding:2px 4px; }
+</style>"""
+
+_PARAMS_HTML = f"""<ul>
+  <li>Caracteres prohibidos (regex): <code>{escape(FORBIDDEN_CHARS_PATTERN)}</code></li>
+  <li>Diacríticos: <code>cualquier marca combinante Unicode (NFD)</code></li>
+  <li>MaxPath: <code>{MAX_PATH_DEFAULT}</code></li>
+  <li>MaxFileName: <code>{MAX_FILE_NAME_DEFAULT}</code></li>
+  <li>MaxDepth: <code>{MAX_DEPTH_DEFAULT}</code></li>
+  <li>Prefijo fusión carpetas: <code>{KEEP_SHORT_DIR}</code></li>
+  <li>Acortado archivos: <code>{KEEP_SHORT_FILE}</code></li>
+  <li>Sufijo aplicado: <code>{SUFFIX_C}</code></li>
+  <li>NO-PDF extraídos a: <code>{NON_PDF_DUMP_NAME}</code></li>
+</ul>"""
+
+# Tabla de incidencias del informe FINAL: se rellena con el dict de counts (+ 'title')
+_COUNTS_TABLE_TPL = """
+        <h3>%(title)s</h3>
+        <table>
+          <tr><th>Problema</th><th>Cantidad</th></tr>
+          <tr><td>Caracteres prohibidos</td><td>%(forbidden_chars)d</td></tr>
+          <tr><td>Diacríticos</td><td>%(diacritics)d</td></tr>
+          <tr><td>Ruta &gt; MaxPath</td><td>%(too_long_path)d</td></tr>
+          <tr><td>Nombre &gt; MaxFileName</td><td>%(too_long_name)d</td></tr>
+          <tr><td>Profundidad &gt; MaxDepth</td><td>%(too_deep)d</td></tr>
+          <tr><td>Ocultos/Temporales</td><td>%(hidden_temp)d</td></tr>
+        </table>"""
+
+_ROW_TPL = "<tr><td>%d</td><td>%s</td><td><code>%s</code></td><td><code>%s</code></td><td>%s</td></tr>"
+
 def save_reports_with_label(results, counts, out_dir: Path, selected_root, label: str):
     out_dir.mkdir(parents=True, exist_ok=True)
     base = f"{PROJECT_NAME} - {label}"
     html_path = out_dir / f"{base}.html"
 
-    def filter_by(key): return [r for r in results if key in (r['Problemas'] or '')]
-    forbidden_rows  = filter_by('Caracteres prohibidos') + filter_by('CaracteresProhibidos')
-    diacritics_rows = filter_by('Diacríticos')
-    path_rows       = filter_by('Ruta>MaxPath')
-    name_rows       = filter_by('Nombre>MaxFileName')
-    depth_rows      = filter_by('Profundidad>MaxDepth')
-    hidden_rows     = filter_by('Oculto/Temporales')
-
-    def render_table(title, rows, action):
+    # Una sola pasada: cada fila va al balde de cada bit encendido en su Mask
+    buckets = [[] for _ in _ISSUE_NAMES]
+    problematic = 0
+    for r in results:
+        m = r['Mask']
+        if m:
+            problematic += 1
+            while m:
+                low = m & -m
+                buckets[low.bit_length() - 1].append(r)
+                m ^= low
+
+    escaped = {}   # Ruta -> (ruta, nombre) escapados; una fila puede salir en varias tablas
+
+    def write_table(write, title, rows, action):
+        """Escribe la tabla fila a fila en lugar de armarla completa en memoria."""
         if not rows:
-            return f"<h3>{title}</h3><p><em>Sin incidencias.</em></p>"
-        body = "".join(
-            f"<tr><td>{i}</td><td>{r['Tipo']}</td>"
-            f"<td><code>{r['Ruta']}</code></td>"
-            f"<td><code>{r['Nombre']}</code></td>"
-            f"<td>{action}</td></tr>"
-            for i, r in enumerate(rows, 1)
-        )
-        return (f"<h3>{title}</h3>"
-                f"<table><thead><tr><th>#</th><th>Tipo</th><th>Ruta</th><th>Nombre</th><th>Corrección</th>"
-                f"</tr></thead><tbody>{body}</tbody></table>")
+            write(f"<h3>{title}</h3><p><em>Sin incidencias.</em></p>")
+            return
+        write(f"<h3>{title}</h3>"
+              f"<table><thead><tr><th>#</th><th>Tipo</th><th>Ruta</th><th>Nombre</th><th>Corrección</th>"
+              f"</tr></thead><tbody>")
+        for i, r in enumerate(rows, 1):
+            esc = escaped.get(r['Ruta'])
+            if esc is None:
+                esc = escaped[r['Ruta']] = (escape(r['Ruta']), escape(r['Nombre']))
+            write(_ROW_TPL % (i, r['Tipo'], esc[0], esc[1], action))
+        write("</tbody></table>")
 
     total = len(results)
-    problematic = sum(1 for r in results if r['Problemas'])
     ok = total - problematic
 
-    html = f"""<!doctype html>
+    header = f"""<!doctype html>
 <html lang="es"><head>
 <meta charset="utf-8">
 <title>{base} - Resumen</title>
-<style>
-body {{ font-family: Arial, sans-serif; margin: 24px; }}
-table {{ border-collapse: collapse; width: 100%; margin-top: 12px; }}
-th, td {{ border: 1px solid #ddd; padding: 6px; font-size: 14px; }}
-th {{ background: #f5f5f5; }}
-.badge {{ display:inline-block; padding:4px 10px; border-radius:10px; font-weight:600; }}
-.badge-ok {{ background:#c8f7c5; }}
-.badge-bad {{ background:#ffd6d6; }}
-code {{ background:#f1f1f1; padding:2px 4px; }}
-</style></head><body>
+{_REPORT_STYLE}</head><body>
 
 <h1>{base} - Resumen de validación</h1>
-<p><strong>Carpeta:</strong> <code>{selected_root}</code></p>
+<p><strong>Carpeta:</strong> <code>{escape(str(selected_root))}</code></p>
 
 <div class="stats">
   <span class="total">Total elementos: <strong class="total">{total}</strong></span>
@@ -752,89 +1652,82 @@ code {{ background:#f1f1f1; padding:2px 4px; }}
 </div>
 
 <h2>Parámetros</h2>
-<ul>
-  <li>Caracteres prohibidos (regex): <code>{FORBIDDEN_CHARS_PATTERN}</code></li>
-  <li>Diacríticos (regex): <code>{DIACRITIC_CHARS_PATTERN}</code></li>
-  <li>MaxPath: <code>{MAX_PATH_DEFAULT}</code></li>
-  <li>MaxFileName: <code>{MAX_FILE_NAME_DEFAULT}</code></li>
-  <li>MaxDepth: <code>{MAX_DEPTH_DEFAULT}</code></li>
-  <li>Prefijo fusión carpetas: <code>{KEEP_SHORT_DIR}</code></li>
-  <li>Acortado archivos: <code>{KEEP_SHORT_FILE}</code></li>
-  <li>Sufijo aplicado: <code>{SUFFIX_C}</code></li>
-  <li>NO-PDF extraídos a: <code>{NON_PDF_DUMP_NAME}</code></li>
-</ul>
+{_PARAMS_HTML}
 
 <h2>Detalles y acción propuesta</h2>
-<div>{render_table("Caracteres prohibidos", forbidden_rows, "<strong>ELIMINAR</strong>")}</div>
-<div>{render_table("Diacríticos", diacritics_rows, "<strong>ELIMINAR</strong>")}</div>
-<div>{render_table("Ruta &gt; MaxPath", path_rows, "<strong>ACORTAR o SUBIR</strong>")}</div>
-<div>{render_table("Nombre &gt; MaxFileName", name_rows, "<strong>RECORTAR</strong>")}</div>
-<div>{render_table("Profundidad &gt; MaxDepth", depth_rows, "<strong>SUBIR AL PADRE</strong> (burbujeo)")}</div>
-<div>{render_table("Ocultos / Temporales", hidden_rows, "<strong>OMITIR</strong> en copia")}</div>
-
-</body></html>"""
-    with open(html_path, 'w', encoding='utf-8') as f:
-        f.write(html)
+"""
+    sections = (("Caracteres prohibidos", "<strong>ELIMINAR</strong>"),
+                ("Diacríticos", "<strong>ELIMINAR</strong>"),
+                ("Ruta &gt; MaxPath", "<strong>ACORTAR o SUBIR</strong>"),
+                ("Nombre &gt; MaxFileName", "<strong>RECORTAR</strong>"),
+                ("Profundidad &gt; MaxDepth", "<strong>SUBIR AL PADRE</strong> (burbujeo)"),
+                ("Ocultos / Temporales", "<strong>OMITIR</strong> en copia"))
+    with open(html_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        write = f.write
+        write(header)
+        for (title, action), rows in zip(sections, buckets):
+            write("<div>")
+            write_table(write, title, rows, action)
+            write("</div>\n")
+        write("\n</body></html>")
     return None, html_path
 
 def save_final_report(initial_counts: dict, corrected_counts: dict, mapping_rows: list,
                       out_dir: Path, selected_root: str, corrected_root: str,
                       initial_files_count: int, corrected_files_in_corr: int, extracted_nonpdf_count: int,
-                      dump_path: str, mapping_csv_enabled: bool):
+                      dump_path: str, mapping_csv_enabled: bool,
+                      known_stats: Optional[dict] = None):
+    """known_stats: {ruta: TreeStats} ya calculados; esas carpetas no se vuelven a recorrer."""
     base = f"{PROJECT_NAME} - FINAL"
     html_path = out_dir / f"{base}.html"
 
-    total_files = sum(1 for m in mapping_rows if m.get("Tipo") == "FILE")
-    conv = sum(1 for m in mapping_rows if m.get("Tipo") == "FILE" and m.get("Estado") == "CONVERTIDO")
-    copi = sum(1 for m in mapping_rows if m.get("Tipo") == "FILE" and (m.get("Estado") in {"COPIADO","COPIADO_LENTO","COPIADO_STUCK_A_CORREGIDA"}))
-    extracted = sum(1 for m in mapping_rows if m.get("Tipo") == "FILE" and m.get("Estado") == "EXTRAIDO_NO_PDF")
-    err  = sum(1 for m in mapping_rows if m.get("Tipo") == "FILE" and ("ERROR" in m.get("Estado","")))
-    omitted_stuck  = sum(1 for m in mapping_rows if m.get("Tipo") == "FILE" and m.get("Estado") == "OMITIDO_STUCK")
-    omitted_hidden = sum(1 for m in mapping_rows if m.get("Tipo") == "FILE" and m.get("Estado") == "OMITIDO")
+    mapping_csv_html = ""
+    if mapping_csv_enabled:
+        # MapRow ya es una tupla: va directo a csv.writer, sin dict ni lista intermedia
+        csv_path = out_dir / f"{PROJECT_NAME} - MAPEO.csv"
+        with open(csv_path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+            writer = csv.writer(f)
+            writer.writerow(('Tipo', 'Original', 'Corregido', 'Estado'))
+            writer.writerows(mapping_rows)
+        mapping_csv_html = f"<strong>Mapeo:</strong> <code>{escape(str(csv_path))}</code><br>\n"
+
+    # Una sola pasada: cuántos FILE hay por Estado
+    by_estado = Counter([m.estado for m in mapping_rows if m.tipo == "FILE"])
+    total_files = sum(by_estado.values())
+    conv = by_estado["CONVERTIDO"]
+    copi = by_estado["COPIADO"] + by_estado["COPIADO_LENTO"] + by_estado["COPIADO_STUCK_A_CORREGIDA"]
+    extracted = by_estado["EXTRAIDO_NO_PDF"]
+    err  = sum(n for estado, n in by_estado.items() if "ERROR" in estado)
+    omitted_stuck  = by_estado["OMITIDO_STUCK"]
+    omitted_hidden = by_estado["OMITIDO"]
     omitted_total  = omitted_stuck + omitted_hidden
 
     same_count = (initial_files_count == (corrected_files_in_corr + extracted_nonpdf_count))
     status_badge = '<span class="badge badge-ok">OK</span>' if same_count else '<span class="badge badge-bad">MISMATCH</span>'
 
-    size_original = dir_size_bytes(Path(selected_root))
-    size_corr     = dir_size_bytes(Path(corrected_root))
-    size_dump     = dir_size_bytes(Path(dump_path))
+    known_stats = known_stats or {}
+    def size_of(p: str) -> int:
+        st = known_stats.get(p)
+        return st.size if st is not None else dir_size_bytes(Path(p))
+
+    size_original = size_of(selected_root)
+    size_corr     = size_of(corrected_root)
+    size_dump     = size_of(dump_path)
     size_final    = size_corr + size_dump
     delta_bytes   = size_final - size_original
     delta_pct     = (delta_bytes / size_original * 100.0) if size_original > 0 else 0.0
 
-    def counts_table(title, c):
-        return f"""
-        <h3>{title}</h3>
-        <table>
-          <tr><th>Problema</th><th>Cantidad</th></tr>
-          <tr><td>Caracteres prohibidos</td><td>{c['forbidden_chars']}</td></tr>
-          <tr><td>Diacríticos</td><td>{c['diacritics']}</td></tr>
-          <tr><td>Ruta &gt; MaxPath</td><td>{c['too_long_path']}</td></tr>
-          <tr><td>Nombre &gt; MaxFileName</td><td>{c['too_long_name']}</td></tr>
-          <tr><td>Profundidad &gt; MaxDepth</td><td>{c['too_deep']}</td></tr>
-          <tr><td>Ocultos/Temporales</td><td>{c['hidden_temp']}</td></tr>
-        </table>"""
-
-    html = f"""<!doctype html>
+    # Se escribe por secciones: las tablas de incidencias van directo al archivo
+    head = f"""<!doctype html>
 <html lang="es"><head>
 <meta charset="utf-8">
 <title>{base}</title>
-<style>
-body {{ font-family: Arial, sans-serif; margin: 24px; }}
-table {{ border-collapse: collapse; width: 100%; margin-top: 12px; }}
-th, td {{ border: 1px solid #ddd; padding: 6px; font-size: 14px; }}
-th {{ background: #f5f5f5; }}
-.badge {{ display:inline-block; padding:4px 10px; border-radius:10px; font-weight:600; }}
-.badge-ok {{ background:#c8f7c5; }}
-.badge-bad {{ background:#ffd6d6; }}
-code {{ background:#f1f1f1; padding:2px 4px; }}
-</style></head><body>
+{_REPORT_STYLE}</head><body>
 
 <h1>{PROJECT_NAME} - Informe FINAL</h1>
-<p><strong>Original:</strong> <code>{selected_root}</code><br>
-<strong>Corregido:</strong> <code>{corrected_root}</code><br>
-<strong>Extraídos NO-PDF:</strong> <code>{dump_path}</code></p>
+<p><strong>Original:</strong> <code>{escape(selected_root)}</code><br>
+<strong>Corregido:</strong> <code>{escape(corrected_root)}</code><br>
+{mapping_csv_html}<strong>Extraídos NO-PDF:</strong> <code>{escape(dump_path)}</code></p>
 
 <h2>Integridad de cantidad de archivos {status_badge}</h2>
 <table>
@@ -868,46 +1761,91 @@ code {{ background:#f1f1f1; padding:2px 4px; }}
 
 <h2>Comparativo de incidencias</h2>
 <div style="display:flex; gap:16px;">
-  <div style="flex:1;">{counts_table("Antes (INICIAL)", initial_counts)}</div>
-  <div style="flex:1;">{counts_table("Después (CORREGIDO)", corrected_counts)}</div>
-</div>
-
-</body></html>"""
-    with open(html_path, 'w', encoding='utf-8') as f:
-        f.write(html)
+  <div style="flex:1;">"""
+    with open(html_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        write = f.write
+        write(head)
+        write(_COUNTS_TABLE_TPL % dict(initial_counts, title="Antes (INICIAL)"))
+        write('</div>\n  <div style="flex:1;">')
+        write(_COUNTS_TABLE_TPL % dict(corrected_counts, title="Después (CORREGIDO)"))
+        write("</div>\n</div>\n\n</body></html>")
     return html_path
 
 # ======= GUI / Flujo =======
+def _ask_source_and_mode(root) -> Tuple[Optional[str], bool]:
+    """
+    Ventana inicial: carpeta a validar y, en la misma decisión, si se crea la copia
+    corregida (antes era otra pregunta tras el reporte INICIAL). -> (carpeta o None, copiar).
+    """
+    dlg = tk.Toplevel(root)
+    dlg.title(PROJECT_NAME)
+    dlg.resizable(False, False)
+    folder = tk.StringVar(master=dlg)
+    convert = tk.BooleanVar(master=dlg, value=True)
+    done = tk.BooleanVar(master=dlg, value=False)
+    chosen = []
+
+    def browse():
+        d = filedialog.askdirectory(parent=dlg, title="Selecciona la carpeta a validar")
+        if d: folder.set(d)
+
+    def accept():
+        if os.path.isdir(folder.get()):
+            chosen.append(folder.get())
+            done.set(True)
+        else:
+            messagebox.showwarning(PROJECT_NAME, "Selecciona una carpeta existente.", parent=dlg)
+
+    tk.Label(dlg, text="Selecciona la carpeta que deseas validar/corregir:", anchor="w").grid(
+        row=0, column=0, columnspan=2, sticky="w", padx=12, pady=(12, 4))
+    ttk.Entry(dlg, textvariable=folder, width=70).grid(row=1, column=0, sticky="we", padx=(12, 4))
+    ttk.Button(dlg, text="Examinar…", command=browse).grid(row=1, column=1, padx=(0, 12))
+    ttk.Checkbutton(dlg, variable=convert,
+                    text="Crear COPIA corregida (profundidad y path controlados) y convertir a PDF").grid(
+        row=2, column=0, columnspan=2, sticky="w", padx=12, pady=8)
+    buttons = tk.Frame(dlg)
+    buttons.grid(row=3, column=0, columnspan=2, sticky="e", padx=12, pady=(0, 12))
+    ttk.Button(buttons, text="Aceptar", command=accept).pack(side="left", padx=4)
+    ttk.Button(buttons, text="Cancelar", command=lambda: done.set(True)).pack(side="left")
+    dlg.protocol("WM_DELETE_WINDOW", lambda: done.set(True))
+    dlg.bind("<Return>", lambda _e: accept())
+    dlg.bind("<Escape>", lambda _e: done.set(True))
+
+    dlg.lift(); dlg.focus_force()
+    dlg.after(0, browse)   # abre el selector de una vez, como antes
+    dlg.wait_variable(done)
+    result = (chosen[0] if chosen else None), convert.get()
+    dlg.destroy()
+    return result
+
 def run_gui():
     root = tk.Tk(); root.withdraw()
-    messagebox.showinfo(PROJECT_NAME, "Selecciona la carpeta que deseas validar/corregir.")
-    selected = filedialog.askdirectory(title="Selecciona la carpeta a validar")
+    selected, create_copy = _ask_source_and_mode(root)
     if not selected: return
     try:
         # INICIAL
-        results_initial, counts_initial = validate_folder(selected)
-        parent = Path(selected).resolve().parent
+        # valida y mide en un recorrido, fuera del hilo de Tk
+        results_initial, counts_initial, orig_stats = _run_in_worker(root, scan_tree, selected)
+        selected_path = Path(selected)
+        parent = selected_path.resolve().parent
         stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         out_dir = parent / REPORT_FOLDER_NAME / stamp
         out_dir.mkdir(parents=True, exist_ok=True)
         _, html_i = save_reports_with_label(results_initial, counts_initial, out_dir, selected, "INICIAL")
 
-        initial_files_count = count_files(Path(selected))
+        initial_files_count = orig_stats.files
 
-        # Abrir INICIAL
+        # Abrir INICIAL (save_reports_with_label ya cerró el archivo: no hay que esperarlo)
         try:
-            for _ in range(10):
-                if Path(html_i).exists(): break
-                time.sleep(0.2)
-            try: webbrowser.open(Path(html_i).resolve().as_uri(), new=2)
+            try: webbrowser.open(html_i.resolve().as_uri(), new=2)
             except Exception:
                 try: os.startfile(html_i)  # type: ignore[attr-defined]
                 except Exception:
-                    subprocess.run(["explorer", "/select,", str(Path(html_i))], check=False)
+                    subprocess.run(["explorer", "/select,", str(html_i)], check=False)
         except Exception:
             pass
 
-        if messagebox.askyesno(PROJECT_NAME, "¿Crear COPIA corregida (profundidad y path controlados) y convertir a PDF?"):
+        if create_copy:
             # Ventana de progreso
             total_files_for_progress = max(initial_files_count, 1)
             prog = tk.Toplevel()
@@ -928,14 +1866,19 @@ def run_gui():
             file_pct = tk.Label(prog, text="0% — 0 / 0 MB", anchor="e")
             file_pct.pack(padx=12, pady=(0, 12), fill="x")
 
+            # Se llaman desde drain() en el hilo de Tk, a lo sumo una vez por tick
+            bar_max = total_files_for_progress
+
             def progress_cb(current, total, rel_path_text):
+                nonlocal bar_max
                 try:
-                    bar.configure(maximum=max(total, 1))
+                    if max(total, 1) != bar_max:
+                        bar_max = max(total, 1)
+                        bar.configure(maximum=bar_max)
                     bar['value'] = current
                     pct = int(current * 100 / total) if total else 100
                     lbl.configure(text=f"Procesando {current}/{total}: {rel_path_text}")
                     pct_lbl.configure(text=f"{pct}%")
-                    _ui_pump()
                 except Exception:
                     pass
 
@@ -950,36 +1893,60 @@ def run_gui():
                     file_pct.configure(
                         text=f"{pct}% — {human_size(done_bytes)} / {human_size(total_bytes)}"
                     )
-                    _ui_pump()
                 except Exception:
                     pass
 
-            # Proceso con progreso
-            mapping, corrected_root, dump_dir = copy_with_rules_and_convert(
-                Path(selected), parent,
-                progress_cb=progress_cb,
-                total_files=initial_files_count,
-                file_progress_cb=file_progress_cb
-            )
+            # Proceso con progreso: la copia corre en un hilo y publica su avance en una
+            # cola; Tk la drena cada UI_REFRESH_SEC (solo el último estado de cada barra)
+            # y atiende ahí las preguntas y conversiones COM que el hilo le pida.
+            events: "queue.Queue[tuple]" = queue.Queue()
+
+            def drain():
+                latest = {}
+                while True:
+                    try:
+                        cb, args = events.get_nowait()
+                    except queue.Empty:
+                        break
+                    latest[cb] = args
+                for cb, args in latest.items():
+                    cb(*args)
+
+            mapping, corrected_root, dump_dir = _run_in_worker(
+                root, lambda: copy_with_rules_and_convert(
+                    selected_path, parent,
+                    progress_cb=lambda *a: events.put((progress_cb, a)),
+                    total_files=initial_files_count,
+                    file_progress_cb=lambda *a: events.put((file_progress_cb, a))),
+                on_tick=drain)
 
             try: prog.destroy()
             except Exception: pass
 
-            # Limpieza
-            removed_corr = prune_empty_dirs(corrected_root, keep_root=True)
-            removed_dump = prune_empty_dirs(dump_dir, keep_root=True)
+            # Dos árboles independientes: el dump se poda y mide en segundo plano
+            # mientras la corregida se poda y valida (y mide)
+            stats_ex = ThreadPoolExecutor(max_workers=1)
+            dump_f = stats_ex.submit(lambda: (prune_empty_dirs(dump_dir, keep_root=True),
+                                              tree_stats(Path(dump_dir))))
+            stats_ex.shutdown(wait=False)
 
             # CORREGIDO
-            results_corr, counts_corr = validate_folder(str(corrected_root))
+            removed_corr, (results_corr, counts_corr, corr_stats) = _run_in_worker(
+                root, lambda: (prune_empty_dirs(corrected_root, keep_root=True),
+                               scan_tree(str(corrected_root))))
             _, html_c = save_reports_with_label(results_corr, counts_corr, out_dir, str(corrected_root), "CORREGIDO")
 
-            corrected_files_in_corr = count_files(Path(corrected_root))
-            extracted_nonpdf_count = count_files(Path(dump_dir))
+            corrected_files_in_corr = corr_stats.files
+            removed_dump, dump_stats = dump_f.result()   # cuenta y tamaño del dump en un recorrido
+            extracted_nonpdf_count = dump_stats.files
             final_html = save_final_report(
                 counts_initial, counts_corr, mapping, out_dir,
                 selected, str(corrected_root),
                 initial_files_count, corrected_files_in_corr, extracted_nonpdf_count,
-                str(dump_dir), mapping_csv_enabled=GENERATE_MAPPING_CSV
+                str(dump_dir), mapping_csv_enabled=GENERATE_MAPPING_CSV,
+                known_stats={selected: orig_stats,
+                             str(corrected_root): corr_stats,
+                             str(dump_dir): dump_stats}
             )
 
             final_total = corrected_files_in_corr + extracted_nonpdf_count
@@ -994,11 +1961,11 @@ def run_gui():
                                               f"- INICIAL: {html_i}\n- CORREGIDO: {html_c}\n- FINAL: {final_html}\n\n"
                                               f"Copia corregida:\n{corrected_root}\n\n"
                                               f"NO-PDF extraídos en:\n{dump_dir}")
-            try: webbrowser.open(Path(final_html).resolve().as_uri(), new=2)
+            try: webbrowser.open(final_html.resolve().as_uri(), new=2)
             except Exception:
                 try: os.startfile(final_html)  # type: ignore[attr-defined]
                 except Exception:
-                    subprocess.run(["explorer", "/select,", str(Path(final_html))], check=False)
+                    subprocess.run(["explorer", "/select,", str(final_html)], check=False)
         else:
             messagebox.showinfo(PROJECT_NAME, f"Validación inicial generada.\n\nReportes en:\n{out_dir}\n\n{html_i}")
     except Exception as e:
@@ -1019,7 +1986,10 @@ def _build_onefile():
     Uso:
       python este_script.py --build --name "SECOPII-DOC-CHECK" --onefile --windowed [--icon icon.ico]
     """
-    import argparse
+    # Uso normal (GUI): no se cargan argparse, glob ni importlib
+    if "--build" not in sys.argv[1:]:
+        return False
+    import argparse, glob, importlib.util
     ap = argparse.ArgumentParser(add_help=False)
     ap.add_argument("--build", action="store_true", help="Generar .exe y salir")
     ap.add_argument("--name", default="SECOPII-DOC-CHECK", help="Nombre del .exe")